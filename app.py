@@ -1,7 +1,9 @@
-from flask import Flask
+from flask import Flask, jsonify, g
 from dotenv import load_dotenv
-import os, sys
+import os, sys, threading
+import click
 from extensions import login_manager, bcrypt
+import pymongo
 from pymongo import MongoClient
 
 # Load environment variables from .env file
@@ -22,16 +24,136 @@ app.config["db"] = db
 
 # Register blueprints for modular routes
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from src.models.indexes import ensure_indexes, check_query_plans
+from src.models.review_stats import rebuild_review_stats
+
+# Create missing MongoDB indexes at startup (ENSURE_INDEXES=0 to skip, e.g. when
+# indexes are managed with `flask --app app indexes` during deploys instead). Bounded by
+# ENSURE_INDEXES_TIMEOUT seconds so an unreachable server can't stall startup or the CLI;
+# builds on large collections that need longer belong in the (unbounded) `indexes` command.
+ENSURE_INDEXES_TIMEOUT = float(os.getenv("ENSURE_INDEXES_TIMEOUT", "5"))
+if os.getenv("ENSURE_INDEXES", "1") == "1":
+    try:
+        with pymongo.timeout(ENSURE_INDEXES_TIMEOUT):
+            ensure_indexes(db)
+    except Exception as e:
+        print(f"Index setup failed: {e}")
+
 from src.routes.auth import auth_bp
-from src.routes.main import main_bp
+from src.routes.main import main_bp, seed_autocomplete_index
+from src.routes.trending import trending
+from src.routes.backdrops import backdrops, pick_backdrop
 from src.routes.movie import movie_bp
-from src.routes.recommend import recommend_bp
+from src.routes.tmdb_client import set_deadline, reset_deadline, TMDB_REQUEST_DEADLINE
+from src.routes.recommend import recommend_bp, warmup_models, readiness, prefetch_popular_movies
 app.register_blueprint(recommend_bp)
 
 app.register_blueprint(movie_bp)
 app.register_blueprint(auth_bp)
 app.register_blueprint(main_bp)
 
+# Preload and warm up recommendation models at startup instead of on the first request.
+# Under `gunicorn --preload` this runs once in the master and forked workers share the
+# loaded pages copy-on-write; the .npy artifacts in MODEL_ARTIFACT_DIR are mmapped and
+# shared either way. Nothing here calls TMDB: that starts per worker, see start_worker_feeds.
+# PRELOAD_MODELS: "1" (block until ready, default), "background" (serve while loading), "0" (lazy)
+# Background warmup runs in each worker, never in a master: a fork mid-load would leave
+# the workers a copy of the model/autocomplete locks held by a thread they don't have.
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "1")
+PRELOAD_TMDB_POPULAR = os.getenv("PRELOAD_TMDB_POPULAR", "0") == "1"
+
+def serving():
+    """
+    False when the app is only being imported to run a `flask` CLI command other than
+    `run` (e.g. `indexes`, `rebuild-review-stats`), which has no use for the models.
+    """
+    if click.get_current_context(silent=True) is None:
+        return True
+    return "run" in sys.argv[1:]
+
+def preload():
+    try:
+        warmup_models()
+    except Exception:
+        pass  # already logged; /ready reports the error and routes retry load_models() lazily
+    seed_autocomplete_index()
+
+if PRELOAD_MODELS not in ("0", "background") and serving():
+    preload()
+
+_feeds_pid = None
+
+@app.before_request
+def start_worker_feeds():
+    # Start the TMDB-backed refreshers (and optional popular prefetch and background
+    # warmup) once per worker, after any fork, so they never run on a master's dead
+    # threads, sockets or locks. The readiness probe's first request starts them too.
+    global _feeds_pid
+    if _feeds_pid == os.getpid():
+        return
+    _feeds_pid = os.getpid()
+    if PRELOAD_MODELS == "background":
+        threading.Thread(target=preload, name="model-warmup", daemon=True).start()
+    trending.ensure_refresher()
+    backdrops.ensure_refresher()
+    if PRELOAD_TMDB_POPULAR:
+        threading.Thread(target=prefetch_popular_movies, name="tmdb-prefetch", daemon=True).start()
+
+@app.before_request
+def start_tmdb_deadline():
+    # Every TMDB call this request makes (incl. fan-out on the shared pool) shares one
+    # time budget, so a TMDB brownout can't hold a worker for a string of full timeouts
+    if TMDB_REQUEST_DEADLINE > 0:
+        g.tmdb_deadline = set_deadline(TMDB_REQUEST_DEADLINE)
+
+@app.teardown_request
+def clear_tmdb_deadline(exc):
+    token = g.pop("tmdb_deadline", None)
+    if token is not None:
+        reset_deadline(token)
+
+@app.context_processor
+def inject_hero_backdrop():
+    # Templates call hero_backdrop() to inline a random pooled backdrop into the first paint
+    return {"hero_backdrop": pick_backdrop}
+
+@app.route("/ready")
+def ready():
+    """
+    Readiness probe: 200 once models are loaded, 503 while loading or after a failed load.
+    With PRELOAD_MODELS=0 there is nothing to wait for: models load on the first request
+    that needs them, so the worker always reports ready.
+    """
+    status = readiness()
+    if PRELOAD_MODELS == "0":
+        return jsonify({**status, "lazy": True}), 200
+    return jsonify(status), 200 if status["ready"] else 503
+
+@app.cli.command("indexes")
+@click.option("--check", is_flag=True, help="Also explain() the hot queries and flag collection scans.")
+def indexes_command(check):
+    """
+    Create the MongoDB indexes the app needs; with --check, verify the query plans.
+    """
+    failed = ensure_indexes(db)
+    click.echo("Indexes ensured" if not failed else f"Failed to create: {', '.join(failed)}")
+    if check:
+        scans = check_query_plans(db)
+        for name, stages in scans.items():
+            click.echo(f"COLLSCAN: {name} ({' <- '.join(stages)})")
+        if not scans:
+            click.echo("All hot queries use an index")
+        if scans or failed:
+            sys.exit(1)
+
+@app.cli.command("rebuild-review-stats")
+def rebuild_review_stats_command():
+    """
+    Recompute the per-item review aggregates from the reviews collection.
+    """
+    rebuild_review_stats(db)
+    click.echo(f"Rebuilt rating aggregates for {db.review_stats.count_documents({})} items")
+
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=5000, debug=True)
 
@@ -0,0 +1,96 @@
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError, ConnectionFailure
+
+
+def _present(field):
+    # Uniqueness only among documents with a non-empty string value (older users may lack
+    # the field or have it null). Equality lookups on a string still match this filter.
+    return {field: {"$gt": ""}}
+
+
+# Indexes required by the app's queries, per collection
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True,
+                   partialFilterExpression=_present("email")),
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True,
+                   partialFilterExpression=_present("username")),
+        IndexModel([("phoneNumber", ASCENDING)], name="phoneNumber_unique", unique=True,
+                   partialFilterExpression=_present("phoneNumber")),
+    ],
+    "likes": [
+        # One reaction per user and item; also serves per-user scans by prefix
+        IndexModel([("user_id", ASCENDING), ("item_id", ASCENDING), ("item_type", ASCENDING)],
+                   name="user_item_unique", unique=True),
+    ],
+    "reviews": [
+        # Keyset pagination order: newest first, _id breaks timestamp ties
+        IndexModel([("item_id", ASCENDING), ("item_type", ASCENDING), ("timestamp", DESCENDING),
+                    ("_id", DESCENDING)], name="item_timestamp_id"),
+        IndexModel([("user_id", ASCENDING), ("item_type", ASCENDING)], name="user_item_type"),
+    ],
+}
+
+# Hot queries whose plans must use an index: (name, collection, filter, sort)
+HOT_QUERIES = [
+    ("login by email or username", "users",
+     {"$or": [{"email": "probe@example.com"}, {"username": "probe"}]}, None),
+    ("user by email", "users", {"email": "probe@example.com"}, None),
+    ("user by username", "users", {"username": "probe"}, None),
+    ("user by phoneNumber", "users", {"phoneNumber": "0000000000"}, None),
+    ("reaction for item", "likes",
+     {"user_id": "probe", "item_id": "0", "item_type": "movie"}, None),
+    ("user's movie reactions", "likes", {"user_id": "probe", "item_type": "movie"}, None),
+    ("reviews for item", "reviews",
+     {"item_id": "0", "item_type": "movie"}, [("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ("user's movie reviews", "reviews", {"user_id": "probe", "item_type": "movie"}, None),
+]
+
+
+def ensure_indexes(db):
+    """
+    Create any missing indexes (a no-op for those that already exist).
+    Returns the names of indexes that could not be built, e.g. because existing
+    documents violate a unique constraint. Gives up on the rest (reporting them all
+    as failed) as soon as the server can't be reached.
+    """
+    pending = [(collection, model) for collection, models in INDEXES.items() for model in models]
+    failed = []
+    for i, (collection, model) in enumerate(pending):
+        name = f"{collection}.{model.document['name']}"
+        try:
+            db[collection].create_indexes([model])
+        except ConnectionFailure as e:
+            print(f"MongoDB unreachable, skipping index setup: {e}")
+            return failed + [f"{c}.{m.document['name']}" for c, m in pending[i:]]
+        except PyMongoError as e:
+            print(f"Could not create index {name}: {e}")
+            failed.append(name)
+    return failed
+
+
+def _plan_stages(plan):
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+def check_query_plans(db):
+    """
+    Run explain() on each hot query and return {query name: winning plan stages}
+    for the ones that fall back to a collection scan.
+    """
+    scans = {}
+    for name, collection, query, sort in HOT_QUERIES:
+        cursor = db[collection].find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        stages = _plan_stages(plan)
+        if "COLLSCAN" in stages:
+            scans[name] = stages
+    return scans
@@ -0,0 +1,65 @@
+RATINGS = range(1, 6)
+
+
+def stats_id(item_type: str, item_id) -> str:
+    return f"{item_type}:{item_id}"
+
+
+def record_review(db, item_type: str, item_id, rating: int, delta: int = 1):
+    """
+    Apply one added (delta=1) or deleted (delta=-1) review to the item's
+    running aggregate in `review_stats`: count, rating sum and star histogram.
+    Only reviews marked `counted` were added, so only those may be subtracted.
+    """
+    db.review_stats.update_one(
+        {"_id": stats_id(item_type, item_id)},
+        {"$inc": {"count": delta, "sum": delta * rating, f"histogram.{rating}": delta}},
+        upsert=True
+    )
+
+
+def summarize(doc) -> dict:
+    """
+    Template-ready summary of a review_stats document (or None): count, mean rating
+    and the histogram as a list of (stars, count, percent), 5 stars first.
+    """
+    doc = doc or {}
+    count = max(doc.get("count", 0), 0)
+    histogram = doc.get("histogram", {})
+    return {
+        "count": count,
+        "average": round(doc.get("sum", 0) / count, 1) if count else None,
+        "histogram": [
+            (stars, histogram.get(str(stars), 0),
+             round(100 * histogram.get(str(stars), 0) / count) if count else 0)
+            for stars in reversed(RATINGS)
+        ]
+    }
+
+
+def get_review_stats(db, item_type: str, item_id) -> dict:
+    return summarize(db.review_stats.find_one({"_id": stats_id(item_type, item_id)}))
+
+
+def rebuild_review_stats(db):
+    """
+    Recompute every aggregate from the reviews collection (backfill, or repair after drift).
+    Every review with a valid rating is marked `counted`, so deleting it later subtracts it.
+    """
+    db.reviews.update_many({"rating": {"$in": list(RATINGS)}}, {"$set": {"counted": True}})
+    db.review_stats.delete_many({})
+    db.reviews.aggregate([
+        {"$match": {"rating": {"$in": list(RATINGS)}}},
+        {"$group": {
+            "_id": {"item_type": "$item_type", "item_id": "$item_id", "rating": "$rating"},
+            "n": {"$sum": 1}
+        }},
+        {"$group": {
+            "_id": {"$concat": ["$_id.item_type", ":", "$_id.item_id"]},
+            "count": {"$sum": "$n"},
+            "sum": {"$sum": {"$multiply": ["$n", "$_id.rating"]}},
+            "histogram": {"$push": {"k": {"$toString": "$_id.rating"}, "v": "$n"}}
+        }},
+        {"$set": {"histogram": {"$arrayToObject": "$histogram"}}},
+        {"$merge": {"into": "review_stats", "whenMatched": "replace"}}
+    ])
@@ -1,8 +1,31 @@
+import os
 from flask_login import UserMixin
 from bson import ObjectId
 from datetime import datetime
 from flask import current_app
+from dotenv import load_dotenv
 from extensions import bcrypt, login_manager
+from src.routes.cache import TTLCache, MISS
+
+load_dotenv()
+
+# ── User loader cache configuration from .env ────────────────────────────────────
+# The cache is only enabled with USER_CACHE_PATH set to a SQLite file shared by every
+# worker: a per-process cache would keep serving edited or deleted users from the
+# workers that didn't handle the change. It is its own file, so user emails and names
+# never land in the TMDB cache.
+USER_CACHE_PATH    = os.getenv("USER_CACHE_PATH", "")
+USER_CACHE_TTL     = int(os.getenv("USER_CACHE_TTL", "60"))  # seconds; 0 disables
+USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", "10000"))
+USER_CACHE_ENABLED = USER_CACHE_TTL > 0 and bool(USER_CACHE_PATH)
+
+# Only the fields User needs; watchlist/favorites can be large
+USER_FIELDS = {"email": 1, "username": 1, "name": 1, "created_at": 1, "profile_pic": 1}
+
+# user id -> projected user fields, shared between workers so invalidation from any
+# worker is seen by all
+user_cache = TTLCache("users", USER_CACHE_TTL, maxsize=USER_CACHE_MAXSIZE,
+                      is_negative=lambda value: False, path=USER_CACHE_PATH) if USER_CACHE_ENABLED else None
 
 
 class User(UserMixin):
@@ -85,6 +108,7 @@ class User(UserMixin):
         db = current_app.config["db"]
         try:
             result = db.users.update_one({"_id": ObjectId(user_id)}, {"$set": updates})
+            invalidate_user(user_id)
             return result.modified_count > 0  # Returns True if an update occurred
         except Exception as e:
             print(f"Error updating user: {e}")
@@ -98,22 +122,53 @@ class User(UserMixin):
         db = current_app.config["db"]
         try:
             result = db.users.delete_one({"_id": ObjectId(user_id)})
+            invalidate_user(user_id)
             return result.deleted_count > 0  # Returns True if a deletion occurred
         except Exception as e:
             print(f"Error deleting user: {e}")
             return False
 
 
+def invalidate_user(user_id):
+    """
+    Drop the cached fields for user_id; call after changing or deleting the user document.
+    """
+    if user_cache is None:
+        return
+    try:
+        user_cache.delete(str(user_id))
+    except Exception as e:
+        print(f"User cache delete error: {e}")
+
+
 @login_manager.user_loader
 def load_user(user_id):
     """
-    Flask-Login: Load a user instance from the user ID.
+    Flask-Login: Load a user instance from the user ID. The projected fields are
+    cached for USER_CACHE_TTL seconds when USER_CACHE_PATH is set, so most requests
+    don't query Mongo.
     """
+    if user_cache is not None:
+        cached = user_cache.get(user_id)
+        if cached is not MISS:
+            # Stored JSON-safe: created_at as epoch seconds
+            return User({**cached, "created_at": datetime.utcfromtimestamp(cached["created_at"])})
+
     db = current_app.config["db"]
     try:
-        user_data = db.users.find_one({"_id": ObjectId(user_id)})
+        user_data = db.users.find_one({"_id": ObjectId(user_id)}, USER_FIELDS)
         if user_data:
-            return User(user_data)
+            user = User(user_data)
+            if user_cache is not None:
+                user_cache.set(user_id, {
+                    "_id": user.id,
+                    "email": user.email,
+                    "username": user.username,
+                    "name": user.name,
+                    "created_at": (user.created_at - datetime(1970, 1, 1)).total_seconds(),
+                    "profile_pic": user.profile_pic,
+                })
+            return user
         return None
     except Exception as e:
         print(f"Error loading user: {e}")
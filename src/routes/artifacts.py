@@ -0,0 +1,150 @@
+# src/routes/artifacts.py
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Directory of flat .npy artifacts, memory-mapped read-only by every worker
+MODEL_ARTIFACT_DIR = os.getenv("MODEL_ARTIFACT_DIR", "model_artifacts")
+
+MANIFEST = "manifest.json"
+
+
+def save_arrays(directory, source=None, **arrays):
+    """
+    Write each array to <directory>/<name>.npy (atomically, via rename) plus a manifest,
+    which records `source` (see source_fingerprint) when given.
+    Workers that already mapped the old files keep their pages until they reload.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = {"created_at": time.time(), "source": source, "arrays": {}}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        tmp_path = os.path.join(directory, f".{name}.npy.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, array, allow_pickle=False)
+        os.replace(tmp_path, os.path.join(directory, f"{name}.npy"))
+        manifest["arrays"][name] = {"dtype": str(array.dtype), "shape": list(array.shape)}
+
+    tmp_path = os.path.join(directory, f".{MANIFEST}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST))
+
+
+def has_arrays(directory):
+    return os.path.exists(os.path.join(directory, MANIFEST))
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST)) as f:
+        return json.load(f)
+
+
+def source_fingerprint(path):
+    """
+    Size and mtime of the file artifacts were exported from, or None if it is missing.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def matches_source(directory, path):
+    """
+    Whether the arrays in `directory` were exported from `path` as it is now. Always
+    true when `path` is missing: the artifacts are then the only copy of the data.
+    """
+    current = source_fingerprint(path)
+    return current is None or read_manifest(directory).get("source") == current
+
+
+def load_arrays(directory, mmap=True):
+    """
+    Load every array listed in the manifest. With mmap=True the arrays are read-only
+    memory maps, so all processes on the box share one copy of the pages.
+    """
+    manifest = read_manifest(directory)
+    mode = "r" if mmap else None
+    return {
+        name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode, allow_pickle=False)
+        for name in manifest["arrays"]
+    }
+
+
+def encode_strings(values):
+    """
+    Pack strings into a flat uint8 UTF-8 blob plus int64 offsets (mmap-friendly).
+    """
+    encoded = [str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+
+def decode_string(blob, offsets, i):
+    return bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+
+def export_artifacts(out_dir=MODEL_ARTIFACT_DIR, backfill_genres=True):
+    """
+    Convert the joblib/CSV artifacts configured for the recommend blueprint into
+    flat arrays under out_dir: svd/ (scorer factors), neighbors/ (top-K index)
+    and catalog/ (row-aligned ids, rank, titles and genres).
+
+    If the CSV has no genres column, genres come from the local metadata store,
+    first backfilled from TMDB for every catalog movie it lacks them for.
+    """
+    import joblib
+    from .svd_scorer import SVDScorer
+    from .neighbor_index import NeighborIndex
+    from .catalog import Catalog
+    from .metadata_store import get_metadata_store
+    from .metadata_store import backfill_genres as backfill_store_genres
+    from . import recommend
+
+    catalog = Catalog.from_csv(recommend.MOVIE_METADATA_CSV_PATH)
+    movie_ids = catalog.ids.tolist()
+
+    if catalog.genres is None:
+        store = get_metadata_store()
+        if backfill_genres:
+            print(f"Backfilled genres for {backfill_store_genres(store, movie_ids)} movies from TMDB")
+        stored = store.all_genres()
+        catalog.genres = [stored.get(int(i), []) for i in movie_ids]
+
+    svd_model = joblib.load(recommend.COLLABORATIVE_MODEL_PATH)
+    save_arrays(os.path.join(out_dir, "svd"), **SVDScorer.from_surprise(svd_model, movie_ids).to_arrays())
+    del svd_model
+
+    if os.path.exists(recommend.CONTENT_NEIGHBORS_PATH):
+        index = NeighborIndex.load(recommend.CONTENT_NEIGHBORS_PATH)
+    else:
+        sim = joblib.load(recommend.CONTENT_SIM_PATH, mmap_mode="r")
+        index = NeighborIndex.from_similarity(sim, k=recommend.CONTENT_NEIGHBORS_K)
+    save_arrays(os.path.join(out_dir, "neighbors"), neighbors=index.neighbors, scores=index.scores)
+
+    save_arrays(os.path.join(out_dir, "catalog"), source=source_fingerprint(recommend.MOVIE_METADATA_CSV_PATH),
+                **catalog.to_arrays())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export memory-mappable recommendation artifacts.")
+    parser.add_argument("--out", default=MODEL_ARTIFACT_DIR, help="output directory")
+    parser.add_argument("--no-genre-backfill", action="store_true",
+                        help="use only the genres already in the metadata store")
+    args = parser.parse_args()
+    export_artifacts(args.out, backfill_genres=not args.no_genre_backfill)
+    print(f"Wrote model artifacts to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ from flask import Blueprint, render_template, redirect, url_for, request, flash,
 from flask_login import login_user, logout_user, current_user, login_required
 from bson import ObjectId
 from flask_bcrypt import Bcrypt
-from src.models.user_model import User  # Assumed to use User model from your PDF
+from src.models.user_model import User, invalidate_user  # Assumed to use User model from your PDF
 
 bcrypt = Bcrypt()
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
@@ -141,6 +141,7 @@ def edit_profile():
 
         if updates:
             db.users.update_one({"_id": ObjectId(user_id)}, {"$set": updates})
+            invalidate_user(user_id)
             flash("Profile updated successfully!", "success")
         else:
             flash("No changes detected.", "info")
@@ -174,6 +175,7 @@ def change_password():
             {"_id": ObjectId(current_user.get_id())},
             {"$set": {"password": bcrypt.generate_password_hash(new_password).decode("utf-8")}}
         )
+        invalidate_user(current_user.get_id())
         flash("Password updated successfully!", "success")
         return redirect(url_for("auth.edit_profile"))
 
@@ -194,6 +196,7 @@ def delete_account():
         return redirect(url_for("auth.edit_profile"))
 
     db.users.delete_one({"_id": ObjectId(user_id)})
+    invalidate_user(user_id)
     flash("Your account has been deleted.", "success")
     logout_user()
     return redirect(url_for("main.index"))
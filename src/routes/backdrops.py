@@ -0,0 +1,51 @@
+# src/routes/backdrops.py
+import os
+import random
+
+from dotenv import load_dotenv
+
+from .tmdb_client import tmdb
+from .trending import RegionalFeed
+
+load_dotenv()
+
+# ── Hero backdrop pool configuration from .env ───────────────────────────────────
+BACKDROP_REGION           = os.getenv("BACKDROP_REGION", "IN")
+BACKDROP_REFRESH_INTERVAL = int(os.getenv("BACKDROP_REFRESH_INTERVAL", "3600"))  # seconds
+BACKDROP_POOL_PAGES       = int(os.getenv("BACKDROP_POOL_PAGES", "2"))           # /movie/popular pages
+TMDB_BACKDROP_BASE        = os.getenv("TMDB_BACKDROP_BASE", "https://image.tmdb.org/t/p/original")
+
+
+def fetch_backdrops(region, pages=BACKDROP_POOL_PAGES):
+    """
+    Popular movies with a backdrop for `region`, for the hero banners; None if every
+    page failed. Pages pick one at random server-side and inline it, so the browser
+    never calls TMDB itself.
+    """
+    results = tmdb.get_many([
+        ("/movie/popular", {"language": "en-US", "page": page, "region": region})
+        for page in range(1, pages + 1)
+    ])
+    if all(data is None for data in results):
+        return None
+    return [
+        {
+            "title": movie.get("title") or "",
+            "year": (movie.get("release_date") or "")[:4],
+            "backdrop_url": TMDB_BACKDROP_BASE + movie["backdrop_path"],
+        }
+        for data in results if data
+        for movie in data.get("results") or []
+        if movie.get("backdrop_path")
+    ]
+
+
+backdrops = RegionalFeed("backdrops", fetch_backdrops, [BACKDROP_REGION], BACKDROP_REFRESH_INTERVAL)
+
+
+def pick_backdrop(region=BACKDROP_REGION):
+    """
+    A random backdrop for `region`, or None if the pool is empty.
+    """
+    pool = backdrops.get(region)
+    return random.choice(pool) if pool else None
@@ -0,0 +1,314 @@
+# src/routes/cache.py
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ── Cache configuration from .env ────────────────────────────────────────────────
+# Set TMDB_CACHE_PATH to a local SQLite file to share one warm cache between all
+# workers on a node; leave it empty for a per-process in-memory cache.
+TMDB_CACHE_PATH    = os.getenv("TMDB_CACHE_PATH", "")
+TMDB_CACHE_MAXSIZE = int(os.getenv("TMDB_CACHE_MAXSIZE", "4096"))
+TMDB_NEGATIVE_TTL  = int(os.getenv("TMDB_NEGATIVE_TTL", "60"))
+# How long past its TTL a TMDB entry may still be served while it is refreshed in the
+# background (stale-while-revalidate); 0 disables
+TMDB_STALE_TTL     = int(os.getenv("TMDB_STALE_TTL", str(24 * 3600)))
+TMDB_REVALIDATE_WORKERS = int(os.getenv("TMDB_REVALIDATE_WORKERS", "4"))
+
+# Default TTL (seconds) per TMDB endpoint; override with TMDB_TTL_<ENDPOINT>
+TMDB_TTLS = {
+    "item": 24 * 3600,          # /movie/{id}, /tv/{id} basic fields
+    "movie_details": 24 * 3600,  # recommendation cards
+    "details_view": 6 * 3600,    # processed /movie/details view models
+    "search": 3600,              # /search/multi
+    "autocomplete": 3600,
+}
+
+MISS = object()
+
+
+class MemoryStore:
+    """
+    Per-process LRU store of (value, expires_at) entries, bounded by maxsize.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteConnections:
+    """
+    Callable returning this thread's sqlite3 connection to `path` (in WAL mode plus
+    any extra pragmas), opened on first use. Connections must not be shared between
+    threads, nor used across a fork, so a forked child starts with none.
+    """
+
+    def __init__(self, path, pragmas=()):
+        self.path = path
+        self.pragmas = ("journal_mode=WAL",) + tuple(pragmas)
+        self._local = threading.local()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._local = threading.local()
+
+    def __call__(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            for pragma in self.pragmas:
+                conn.execute(f"PRAGMA {pragma}")
+            self._local.conn = conn
+        return conn
+
+
+class SQLiteStore:
+    """
+    Store backed by a local SQLite file, shared by every process that opens it.
+    Values are JSON-encoded; each namespace is bounded by maxsize.
+    """
+
+    PRUNE_EVERY = 256  # writes between size checks
+
+    def __init__(self, path, namespace, maxsize):
+        self.path = path
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self._connect = SQLiteConnections(path, pragmas=("synchronous=NORMAL",))
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expiry ON cache (namespace, expires_at)")
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, expires_at):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value), expires_at)
+            )
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._prune()
+
+    def _prune(self):
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND expires_at < ?",
+                (self.namespace, time.time())
+            )
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+            if count > self.maxsize:
+                # Evict the entries closest to expiry first
+                conn.execute(
+                    "DELETE FROM cache WHERE rowid IN ("
+                    " SELECT rowid FROM cache WHERE namespace = ? ORDER BY expires_at LIMIT ?)",
+                    (self.namespace, count - self.maxsize)
+                )
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+
+def make_store(namespace, maxsize, shared=True, path=None):
+    """
+    SQLite store at `path` (default TMDB_CACHE_PATH) when one is configured and
+    shared=True, else in-memory.
+    """
+    path = path or TMDB_CACHE_PATH
+    if shared and path:
+        return SQLiteStore(path, namespace, maxsize)
+    return MemoryStore(maxsize)
+
+
+class TTLCache:
+    """
+    Size-bounded cache with per-entry expiry. Values for which `is_negative(value)`
+    is true (failed lookups) are kept for negative_ttl seconds only.
+
+    With stale_ttl > 0, good values are kept stale_ttl seconds past their TTL: `get`
+    ignores them, `lookup` returns them flagged as stale.
+    """
+
+    def __init__(self, namespace, ttl, maxsize=TMDB_CACHE_MAXSIZE,
+                 negative_ttl=TMDB_NEGATIVE_TTL, is_negative=None, shared=True, stale_ttl=0, path=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.is_negative = is_negative or (lambda value: not value)
+        self.store = make_store(namespace, maxsize, shared, path)
+
+    def lookup(self, key):
+        """
+        (value, fresh) for a cached key, or MISS. Stored expiry includes the stale
+        window for good values, so they are fresh until stale_ttl before it.
+        """
+        try:
+            entry = self.store.get(key)
+        except Exception as e:
+            print(f"Cache read error ({self.namespace}): {e}")
+            return MISS
+        now = time.time()
+        if entry is None or entry[1] < now:
+            return MISS
+        value, expires_at = entry
+        fresh = self.is_negative(value) or expires_at - self.stale_ttl >= now
+        return value, fresh
+
+    def get(self, key, default=MISS):
+        entry = self.lookup(key)
+        if entry is MISS or not entry[1]:
+            return default
+        return entry[0]
+
+    def set(self, key, value, ttl=None):
+        negative = self.is_negative(value)
+        if ttl is None:
+            ttl = self.negative_ttl if negative else self.ttl
+        if not negative:
+            ttl += self.stale_ttl
+        try:
+            self.store.set(key, value, time.time() + ttl)
+        except Exception as e:
+            print(f"Cache write error ({self.namespace}): {e}")
+
+    def delete(self, key):
+        self.store.delete(key)
+
+    def clear(self):
+        self.store.clear()
+
+
+def endpoint_ttl(endpoint):
+    return int(os.getenv(f"TMDB_TTL_{endpoint.upper()}", TMDB_TTLS.get(endpoint, 3600)))
+
+
+def make_key(args, kwargs):
+    return json.dumps([args, sorted(kwargs.items())], default=str)
+
+
+# Background refreshes of stale entries; never on a request's deadline
+_revalidate_pool = ThreadPoolExecutor(max_workers=TMDB_REVALIDATE_WORKERS, thread_name_prefix="cache-revalidate")
+
+
+def _reset_revalidate_pool():
+    # Pool threads don't survive a fork
+    global _revalidate_pool
+    _revalidate_pool = ThreadPoolExecutor(max_workers=TMDB_REVALIDATE_WORKERS, thread_name_prefix="cache-revalidate")
+
+
+os.register_at_fork(after_in_child=_reset_revalidate_pool)
+
+
+def tmdb_cached(endpoint, maxsize=TMDB_CACHE_MAXSIZE, is_negative=None, stale_ttl=TMDB_STALE_TTL):
+    """
+    Decorator replacing functools.lru_cache for TMDB fetchers: caches results by
+    arguments with the endpoint's TTL, caches failures (falsy results) briefly,
+    and uses the shared SQLite store when configured.
+
+    Expired results are served for up to stale_ttl more seconds while one background
+    call refreshes them; a failed refresh keeps the stale value and is retried after
+    negative_ttl, so a TMDB outage leaves cached pages working.
+    """
+    def decorator(func):
+        cache = TTLCache(endpoint, endpoint_ttl(endpoint), maxsize=maxsize,
+                         is_negative=is_negative, stale_ttl=stale_ttl)
+        refreshing = {}  # key -> time the last background refresh started
+        lock = threading.Lock()
+
+        def revalidate(key, args, kwargs):
+            try:
+                value = func(*args, **kwargs)
+            except Exception as e:
+                print(f"Cache refresh error ({endpoint}): {e}")
+                return
+            if cache.is_negative(value):
+                return  # keep serving the stale value; retried after negative_ttl
+            cache.set(key, value)
+            with lock:
+                refreshing.pop(key, None)
+
+        def schedule_refresh(key, args, kwargs):
+            now = time.time()
+            with lock:
+                if now - refreshing.get(key, 0) < cache.negative_ttl:
+                    return  # already refreshing, or it failed moments ago
+                refreshing[key] = now
+            _revalidate_pool.submit(revalidate, key, args, kwargs)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            entry = cache.lookup(key)
+            if entry is not MISS:
+                value, fresh = entry
+                if not fresh:
+                    schedule_refresh(key, args, kwargs)
+                return value
+            value = func(*args, **kwargs)
+            cache.set(key, value)
+            return value
+
+        def peek(*args, **kwargs):
+            # Cached value for these arguments (possibly stale or a cached failure), or MISS
+            entry = cache.lookup(make_key(args, kwargs))
+            return entry if entry is MISS else entry[0]
+
+        wrapper.cache = cache
+        wrapper.cache_clear = cache.clear
+        wrapper.peek = peek
+        return wrapper
+
+    return decorator
@@ -0,0 +1,89 @@
+# src/routes/catalog.py
+import numpy as np
+
+from .utils import parse_genres
+from .artifacts import encode_strings, decode_string
+
+# Columns used to rank rows, in order of preference (first one present wins)
+RANK_COLUMNS = ("popularity", "vote_count", "vote_average")
+
+
+class MovieRecord:
+    """
+    Lightweight catalog row handed to the recommendation helpers.
+    """
+
+    __slots__ = ("row", "id", "title")
+
+    def __init__(self, row, id, title):
+        self.row = row
+        self.id = id
+        self.title = title
+
+
+class Catalog:
+    """
+    Struct-of-arrays movie catalog: row-aligned ids, titles, rank scores and
+    (optionally) genres, plus id -> row and lowercase title -> row hash indexes.
+    Replaces the pandas DataFrame on request paths.
+    """
+
+    def __init__(self, ids, titles, rank, genres=None):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.titles = list(titles)
+        self.rank = np.asarray(rank, dtype=np.float32)
+        self.genres = genres  # list of genre-name lists, or None if the source has no genres
+        self.row_by_id = {int(movie_id): row for row, movie_id in enumerate(self.ids)}
+        self.row_by_title = {title.lower(): row for row, title in enumerate(self.titles)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def record(self, row):
+        row = int(row)
+        return MovieRecord(row, int(self.ids[row]), self.titles[row])
+
+    def records(self, rows):
+        return [self.record(row) for row in rows]
+
+    def sample(self, n, rng=np.random):
+        rows = rng.choice(len(self), size=min(n, len(self)), replace=False)
+        return self.records(rows)
+
+    @classmethod
+    def from_csv(cls, csv_path):
+        import pandas as pd
+
+        df = pd.read_csv(csv_path)
+        rank_column = next((c for c in RANK_COLUMNS if c in df.columns), None)
+        if rank_column is None:
+            rank = np.zeros(len(df))
+        else:
+            rank = pd.to_numeric(df[rank_column], errors="coerce").fillna(0.0).to_numpy()
+        genres = [parse_genres(g) for g in df["genres"]] if "genres" in df.columns else None
+        return cls(df["id"].to_numpy(), df["title"].fillna("").astype(str), rank, genres)
+
+    def to_arrays(self):
+        """
+        Flat arrays for artifacts.save_arrays; the inverse of from_arrays.
+        """
+        title_blob, title_offsets = encode_strings(self.titles)
+        arrays = {
+            "ids": self.ids,
+            "rank": self.rank,
+            "title_blob": title_blob,
+            "title_offsets": title_offsets,
+        }
+        if self.genres is not None:
+            arrays["genre_blob"], arrays["genre_offsets"] = encode_strings("|".join(g) for g in self.genres)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        offsets = arrays["title_offsets"]
+        titles = [decode_string(arrays["title_blob"], offsets, i) for i in range(len(offsets) - 1)]
+        genres = None
+        if "genre_blob" in arrays:
+            offsets = arrays["genre_offsets"]
+            genres = [parse_genres(decode_string(arrays["genre_blob"], offsets, i)) for i in range(len(offsets) - 1)]
+        return cls(arrays["ids"], titles, arrays["rank"], genres)
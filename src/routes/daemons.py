@@ -0,0 +1,61 @@
+# src/routes/daemons.py
+import os
+import time
+import fcntl
+import threading
+from contextlib import contextmanager
+
+_started = {}  # daemon name -> pid of the process that started it
+_started_lock = threading.Lock()
+
+
+@contextmanager
+def node_lock(path):
+    """
+    Try to take an exclusive non-blocking flock on `path`. Yields True while this
+    process holds it, False if another process on the node already does.
+    """
+    with open(path, "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+        else:
+            yield True
+
+
+def start_per_process_daemon(name, target, interval=0, lock_path=None):
+    """
+    Start a daemon thread called `name` unless this process already has one: threads
+    don't survive a fork, so each forked worker starts its own on its first call.
+
+    With interval > 0 the thread calls target() every `interval` seconds, skipping a
+    run while another process on the node holds `lock_path` (if given); otherwise it
+    calls target() once, for loops that pace themselves. Returns whether it started.
+    """
+    pid = os.getpid()
+    if _started.get(name) == pid:
+        return False
+    with _started_lock:
+        if _started.get(name) == pid:
+            return False
+        _started[name] = pid
+
+    def run_periodically():
+        while True:
+            time.sleep(interval)
+            if lock_path is None:
+                run_once()
+                continue
+            with node_lock(lock_path) as held:
+                if held:
+                    run_once()
+
+    def run_once():
+        try:
+            target()
+        except Exception as e:
+            print(f"{name} error: {e}")
+
+    threading.Thread(target=run_periodically if interval > 0 else run_once, name=name, daemon=True).start()
+    return True
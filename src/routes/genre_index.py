@@ -0,0 +1,79 @@
+# src/routes/genre_index.py
+import numpy as np
+
+# Catalog/TMDB spellings for genre names used in EMOTION_GENRE_MAP
+GENRE_ALIASES = {
+    "sci-fi": "science fiction",
+    "scifi": "science fiction",
+}
+
+# Candidate pool per emotion that random picks are drawn from (multiple of n)
+POOL_FACTOR = 5
+
+
+def normalize_genre(name):
+    name = str(name).strip().lower()
+    return GENRE_ALIASES.get(name, name)
+
+
+class GenreIndex:
+    """
+    Inverted index genre -> catalog rows, built once at load. Rows in every posting
+    list are ordered by rank (popularity/rating, best first), and the candidate set
+    for each emotion is precomputed, so a request only touches its candidates.
+    """
+
+    def __init__(self, postings, rank):
+        self.postings = postings  # normalized genre -> int32 row ids, best-ranked first
+        self.rank = rank
+        self.emotion_rows = {}
+
+    @classmethod
+    def from_row_genres(cls, row_genres, rank):
+        """
+        Build from one list of genre names per catalog row and a rank score per row.
+        """
+        rank = np.asarray(rank, dtype=np.float64)
+        rows_by_genre = {}
+        for row, genres in enumerate(row_genres):
+            for genre in genres:
+                rows_by_genre.setdefault(normalize_genre(genre), []).append(row)
+
+        postings = {}
+        for genre, rows in rows_by_genre.items():
+            rows = np.asarray(rows, dtype=np.int32)
+            postings[genre] = rows[np.argsort(-rank[rows], kind="stable")]
+        return cls(postings, rank)
+
+    def __bool__(self):
+        return bool(self.postings)
+
+    def candidates(self, genres):
+        """
+        Union of the rows tagged with any of `genres`, best-ranked first.
+        """
+        lists = [self.postings[g] for g in map(normalize_genre, genres) if g in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+        rows = np.unique(np.concatenate(lists))
+        return rows[np.argsort(-self.rank[rows], kind="stable")]
+
+    def precompute_emotions(self, emotion_genre_map):
+        """
+        Cache the ranked candidate rows for every emotion in the mapping.
+        """
+        self.emotion_rows = {
+            emotion: self.candidates(genres) for emotion, genres in emotion_genre_map.items()
+        }
+
+    def pick(self, emotion, n, rng=np.random):
+        """
+        Return n rows for `emotion`, drawn at random from its top POOL_FACTOR * n
+        candidates and ordered by rank. Empty if the emotion has no candidates.
+        """
+        rows = self.emotion_rows.get(emotion)
+        if rows is None or len(rows) == 0:
+            return np.empty(0, dtype=np.int32)
+        pool = rows[: n * POOL_FACTOR]
+        chosen = np.sort(rng.choice(len(pool), size=min(n, len(pool)), replace=False))
+        return pool[chosen]
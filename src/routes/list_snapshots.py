@@ -0,0 +1,157 @@
+# src/routes/list_snapshots.py
+import os
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from .tmdb_client import tmdb
+from .daemons import start_per_process_daemon
+from .metadata_store import get_metadata_store
+
+load_dotenv()
+
+# ── Watchlist/favorites card snapshot configuration from .env ────────────────────
+SNAPSHOT_MAX_AGE          = int(os.getenv("SNAPSHOT_MAX_AGE", str(7 * 24 * 3600)))  # seconds
+SNAPSHOT_REFRESH_INTERVAL = int(os.getenv("SNAPSHOT_REFRESH_INTERVAL", "3600"))     # 0 disables
+SNAPSHOT_REFRESH_BATCH    = int(os.getenv("SNAPSHOT_REFRESH_BATCH", "200"))         # users per run
+SNAPSHOT_LOCK_PATH        = os.getenv("SNAPSHOT_LOCK_PATH", "snapshot_refresh.lock")
+SNAPSHOT_RETRY_AFTER      = int(os.getenv("SNAPSHOT_RETRY_AFTER", str(24 * 3600)))  # after a failed fetch
+
+LIST_FIELDS = ("watchlist", "favorites")
+
+
+def basic_card(raw: dict, item_type: str) -> dict:
+    """
+    Compact list card from a TMDB movie/tv payload.
+    """
+    return {
+        "id": str(raw.get("id")),
+        "type": item_type,
+        "title": raw.get("title") or raw.get("name") or "N/A",
+        "poster_path": raw.get("poster_path") or "",
+        "vote_average": raw.get("vote_average", 0.0) or 0.0,
+        "release_date": raw.get("release_date") or raw.get("first_air_date") or "",
+    }
+
+
+def fetch_snapshot(item_type: str, item_id) -> dict:
+    """
+    Card snapshot for a list entry: the local metadata store for movies it can render,
+    else TMDB. Returns None if neither has the item. Safe outside a request context.
+    """
+    if item_type == "movie":
+        try:
+            row = get_metadata_store().get_many([int(item_id)]).get(int(item_id))
+        except Exception as e:
+            print(f"Metadata store read error: {e}")
+            row = None
+        if row and row.get("poster_path"):
+            return {**basic_card(row, "movie"), "snapshot_at": datetime.utcnow()}
+    try:
+        raw = tmdb.get(f"/{item_type}/{item_id}")
+    except Exception as e:
+        print(f"Snapshot fetch failed for {item_type}/{item_id}: {e}")
+        return None
+    return {**basic_card(raw, item_type), "snapshot_at": datetime.utcnow()}
+
+
+def store_snapshot(db, user_id, field: str, item_type: str, item_id, card: dict):
+    """
+    Attach `card` to the matching entry of the user's `field` list (if still there).
+    """
+    db.users.update_one(
+        {"_id": user_id},
+        {"$set": {f"{field}.$[entry].card": card}},
+        array_filters=[{"entry.id": str(item_id), "entry.type": item_type}]
+    )
+
+
+def store_snapshots(db, user_id, field: str, cards: dict):
+    """
+    Attach several cards ({(type, id): card}) to their entries of the user's `field`
+    list in one update. Entries no longer in the list are skipped.
+    """
+    if not cards:
+        return
+    updates, filters = {}, []
+    for n, ((item_type, item_id), card) in enumerate(cards.items()):
+        updates[f"{field}.$[e{n}].card"] = card
+        filters.append({f"e{n}.id": str(item_id), f"e{n}.type": item_type})
+    db.users.update_one({"_id": user_id}, {"$set": updates}, array_filters=filters)
+
+
+def mark_failed(db, user_id, field: str, item_type: str, item_id):
+    """
+    Record a failed snapshot fetch, so the refresher skips the entry for SNAPSHOT_RETRY_AFTER.
+    """
+    db.users.update_one(
+        {"_id": user_id},
+        {"$set": {f"{field}.$[entry].snapshot_failed_at": datetime.utcnow()}},
+        array_filters=[{"entry.id": str(item_id), "entry.type": item_type}]
+    )
+
+
+def snapshot_entry(db, user_id, field: str, item_type: str, item_id):
+    """
+    Fetch and store the snapshot for one entry; meant to run on tmdb.executor right
+    after the entry is added, so the toggle itself makes no outbound call.
+    """
+    try:
+        card = fetch_snapshot(item_type, item_id)
+        if card:
+            store_snapshot(db, user_id, field, item_type, item_id, card)
+    except Exception as e:
+        print(f"Snapshot error for {field} {item_type}/{item_id}: {e}")
+
+
+def stale_filter(cutoff, retry_cutoff):
+    # Entries without a fresh card, unless a fetch for them failed recently
+    stale = {"$elemMatch": {
+        "$or": [{"card": {"$exists": False}}, {"card.snapshot_at": {"$lt": cutoff}}],
+        "$nor": [{"snapshot_failed_at": {"$gte": retry_cutoff}}],
+    }}
+    return {"$or": [{field: stale} for field in LIST_FIELDS]}
+
+
+def needs_snapshot(entry, cutoff, retry_cutoff):
+    card = entry.get("card")
+    if card and card.get("snapshot_at") and card["snapshot_at"] >= cutoff:
+        return False
+    failed_at = entry.get("snapshot_failed_at")
+    return not failed_at or failed_at < retry_cutoff
+
+
+def refresh_stale_snapshots(db, batch=SNAPSHOT_REFRESH_BATCH):
+    """
+    Re-snapshot missing or older-than-SNAPSHOT_MAX_AGE entries for up to `batch` users.
+    Each distinct item is fetched once per run. Entries whose fetch fails are marked
+    and left alone for SNAPSHOT_RETRY_AFTER, so they can't keep their users at the
+    front of every batch.
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=SNAPSHOT_MAX_AGE)
+    retry_cutoff = now - timedelta(seconds=SNAPSHOT_RETRY_AFTER)
+    cards = {}
+    users = db.users.find(stale_filter(cutoff, retry_cutoff), {field: 1 for field in LIST_FIELDS}).limit(batch)
+    for user in users:
+        for field in LIST_FIELDS:
+            for entry in user.get(field, []):
+                if not needs_snapshot(entry, cutoff, retry_cutoff):
+                    continue
+                key = (entry.get("type", "movie"), str(entry.get("id")))
+                if key not in cards:
+                    cards[key] = fetch_snapshot(*key)
+                if cards[key]:
+                    store_snapshot(db, user["_id"], field, key[0], key[1], cards[key])
+                else:
+                    mark_failed(db, user["_id"], field, key[0], key[1])
+
+
+def ensure_snapshot_refresher(db):
+    """
+    Start this process's refresher, which runs refresh_stale_snapshots every
+    SNAPSHOT_REFRESH_INTERVAL seconds on one worker per node.
+    """
+    if SNAPSHOT_REFRESH_INTERVAL > 0:
+        start_per_process_daemon("snapshot-refresher", lambda: refresh_stale_snapshots(db),
+                                 SNAPSHOT_REFRESH_INTERVAL, SNAPSHOT_LOCK_PATH)
@@ -1,52 +1,58 @@
 # main.py (Blueprint for “main”)
 from flask import Blueprint, render_template, request, flash, jsonify
 from flask_login import current_user
-import requests
 import os
+import threading
+from collections import OrderedDict
+import requests
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor
-from functools import lru_cache
+
+from .cache import tmdb_cached, MISS
+from .tmdb_client import tmdb
+from .title_index import TitleIndex, fold
+from .metadata_store import get_metadata_store
+from .trending import trending
 
 # Load environment variables
 load_dotenv()
 
 main_bp = Blueprint('main', __name__, template_folder='templates/home')
 
-TMDB_API_KEY = os.getenv('TMDB_API_KEY')
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
-
-# Create a single session for keep-alive / connection pooling
-session = requests.Session()
-adapter = requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10)
-session.mount("https://", adapter)
-session.headers.update({"Accept": "application/json"})
-
-def fetch_tmdb_json(url):
+AUTOCOMPLETE_LIMIT     = 8
+AUTOCOMPLETE_MIN_LOCAL = int(os.getenv("AUTOCOMPLETE_MIN_LOCAL", "5"))  # fewer local hits -> ask TMDB
+TMDB_PAGE_SIZE         = 20  # /search/multi results per page; fewer means the result set is complete
+AUTOCOMPLETE_MAX_LEARNED = int(os.getenv("AUTOCOMPLETE_MAX_LEARNED", "20000"))  # TMDB results kept (LRU)
+TRENDING_REGION        = os.getenv("TRENDING_REGION", "IN")
+
+# Local movie + TV title index for autocomplete, seeded from the metadata store and
+# grown with every TMDB search result we see
+autocomplete_index = TitleIndex()
+_autocomplete_seeded = False
+_autocomplete_lock = threading.Lock()
+# Keys of entries learned from TMDB searches (not seeded), least recently seen first
+_learned_keys = OrderedDict()
+_learned_lock = threading.Lock()
+
+def fetch_tmdb_json(path, params=None):
     """
-    Fetch JSON from TMDB via a persistent session, with error handling.
+    Fetch JSON from TMDB via the shared pooled client, with error handling.
     Returns the parsed JSON or an empty dict on failure.
     """
     try:
-        resp = session.get(url, timeout=5)
-        resp.raise_for_status()
-        return resp.json()
+        return tmdb.get(path, params)
     except requests.RequestException as e:
         print(f"Error fetching from TMDB: {e}")
         return {}
 
-@lru_cache(maxsize=128)
+@tmdb_cached("search", maxsize=1024)
 def cached_search_results(query: str):
     """
     Cached call to TMDB /search/multi?query={query}. Returns a tuple of results list.
     """
-    url = (
-        f"{TMDB_BASE_URL}/search/multi"
-        f"?api_key={TMDB_API_KEY}&query={requests.utils.requote_uri(query)}&include_adult=false"
-    )
-    data = fetch_tmdb_json(url)
+    data = fetch_tmdb_json("/search/multi", {"query": query, "include_adult": "false"})
     return tuple(data.get("results", []))
 
-@lru_cache(maxsize=128)
+@tmdb_cached("autocomplete", maxsize=1024)
 def cached_autocomplete_results(prefix: str):
     """
     Cached call to TMDB /search/multi for autocomplete. Returns a tuple of results list.
@@ -54,28 +60,93 @@ def cached_autocomplete_results(prefix: str):
     # Reuse cached_search_results under the hood for the same prefix
     return cached_search_results(prefix)
 
+def autocomplete_entry(item):
+    """
+    Autocomplete suggestion for a TMDB /search/multi result, or None if not a movie/tv.
+    """
+    mtype = item.get("media_type")
+    if mtype not in ("movie", "tv"):
+        return None
+    title = item.get("title") or item.get("name")
+    year = (item.get("release_date") or item.get("first_air_date") or "")[:4]
+    poster = item.get("poster_path")
+    return {
+        "title": title,
+        "year": year or "",
+        "poster": f"https://image.tmdb.org/t/p/w92{poster}" if poster else "",
+        "id": item.get("id"),
+        "media_type": mtype
+    }
+
+def remember_search_results(results):
+    """
+    Add movie/tv results seen from TMDB to the local autocomplete index. At most
+    AUTOCOMPLETE_MAX_LEARNED of them are kept, least recently seen evicted first;
+    seeded entries are only refreshed, never evicted.
+    """
+    for item in results:
+        entry = autocomplete_entry(item)
+        if not entry or not entry["title"]:
+            continue
+        key = (entry["media_type"], entry["id"])
+        with _learned_lock:
+            learned = key in _learned_keys or key not in autocomplete_index.keys
+            if learned:
+                _learned_keys[key] = True
+                _learned_keys.move_to_end(key)
+                evicted = _learned_keys.popitem(last=False)[0] if len(_learned_keys) > AUTOCOMPLETE_MAX_LEARNED else None
+            else:
+                evicted = None
+        autocomplete_index.add(key, entry["title"], item.get("popularity", 0.0) or 0.0, entry)
+        if evicted is not None:
+            autocomplete_index.remove(evicted)
+
+def seed_autocomplete_index():
+    """
+    Load every movie from the local metadata store into the autocomplete index (once per
+    process, retried on the next call after a failure).
+    """
+    global _autocomplete_seeded
+    if _autocomplete_seeded:
+        return
+    with _autocomplete_lock:
+        if _autocomplete_seeded:
+            return
+        try:
+            autocomplete_index.add_many(
+                (("movie", movie_id), title, popularity or 0.0, autocomplete_entry({
+                    "media_type": "movie", "id": movie_id, "title": title,
+                    "poster_path": poster, "release_date": release_date
+                }))
+                for movie_id, title, poster, release_date, popularity in get_metadata_store().iter_titles()
+            )
+        except Exception as e:
+            # Left unset so the next call retries; re-adding rows already in is a no-op
+            print(f"Error seeding autocomplete index: {e}")
+            return
+        _autocomplete_seeded = True
+
+def derive_from_shorter_prefix(query):
+    """
+    If a shorter prefix of `query` has a cached, complete (under one page) TMDB result
+    set, filter it locally instead of calling TMDB. Returns the results or None.
+    """
+    folded = fold(query)
+    for end in range(len(query) - 1, 1, -1):
+        cached = cached_autocomplete_results.peek(query[:end])
+        if cached is MISS or not cached or len(cached) >= TMDB_PAGE_SIZE:
+            continue
+        return [
+            item for item in cached
+            if folded in fold(item.get("title") or item.get("name") or "")
+        ]
+    return None
+
 @main_bp.route("/")
 def index():
-    # TRENDING (India, week) for movies + TV
-    movie_url = f"{TMDB_BASE_URL}/trending/movie/week?api_key={TMDB_API_KEY}&region=IN"
-    tv_url = f"{TMDB_BASE_URL}/trending/tv/week?api_key={TMDB_API_KEY}&region=IN"
-
-    try:
-        # Fetch both endpoints in parallel to minimize latency
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            future_movie = executor.submit(fetch_tmdb_json, movie_url)
-            future_tv = executor.submit(fetch_tmdb_json, tv_url)
-
-            tm = future_movie.result().get("results", []) or []
-            tv = future_tv.result().get("results", []) or []
-
-        combined = tm + tv
-        # Sort by popularity descending
-        combined.sort(key=lambda x: x.get("popularity", 0), reverse=True)
-        top_trending = combined[:20]
-    except Exception as e:
-        print(f"Error fetching trending content: {e}")
-        top_trending = []
+    # TRENDING (India, week) for movies + TV, from the background-refreshed snapshot
+    top_trending = trending.get(TRENDING_REGION)
+    if not top_trending:
         flash("Failed to fetch trending content. Please try again later.", "error")
 
     return render_template(
@@ -98,6 +169,7 @@ def search():
 
     try:
         raw_results = cached_search_results(query)
+        remember_search_results(raw_results)
         processed_results = []
         seen = set()
         for item in raw_results:
@@ -138,26 +210,27 @@ def autocomplete():
         return jsonify({"results": []})
 
     try:
-        raw = cached_autocomplete_results(query)
+        # 1) Local index first: no upstream call when it has enough hits
+        seed_autocomplete_index()
+        local = autocomplete_index.search(query, limit=AUTOCOMPLETE_LIMIT)
+        if len(local) >= AUTOCOMPLETE_MIN_LOCAL:
+            return jsonify({"results": local})
+
+        # 2) Narrow a complete result set cached for a shorter prefix, else ask TMDB
+        raw = derive_from_shorter_prefix(query)
+        if raw is None:
+            raw = cached_autocomplete_results(query)
+            remember_search_results(raw)
+
         suggestions = []
-        count = 0
-        for item in raw:
-            if count >= 8:
+        seen = set()
+        for entry in [autocomplete_entry(item) for item in raw] + local:
+            if len(suggestions) >= AUTOCOMPLETE_LIMIT:
                 break
-            mtype = item.get("media_type")
-            if mtype not in ("movie", "tv"):
+            if not entry or (entry["media_type"], entry["id"]) in seen:
                 continue
-            title = item.get("title") or item.get("name")
-            year = (item.get("release_date") or item.get("first_air_date", ""))[:4]
-            poster = item.get("poster_path")
-            suggestions.append({
-                "title": title,
-                "year": year or "",
-                "poster": f"https://image.tmdb.org/t/p/w92{poster}" if poster else "",
-                "id": item.get("id"),
-                "media_type": mtype
-            })
-            count += 1
+            seen.add((entry["media_type"], entry["id"]))
+            suggestions.append(entry)
     except Exception as e:
         print(f"Autocomplete error: {e}")
         suggestions = []
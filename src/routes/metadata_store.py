@@ -0,0 +1,267 @@
+# src/routes/metadata_store.py
+import os
+import json
+import time
+import threading
+
+from dotenv import load_dotenv
+
+from .utils import parse_genres
+from .cache import SQLiteConnections
+from .daemons import start_per_process_daemon
+from .tmdb_client import tmdb
+
+load_dotenv()
+
+# ── Metadata store configuration from .env ───────────────────────────────────────
+METADATA_DB_PATH          = os.getenv("METADATA_DB_PATH",          "movie_metadata.db")
+MOVIE_METADATA_CSV_PATH   = os.getenv("MOVIE_METADATA_CSV_PATH",   "movie_metadata.csv")
+METADATA_REFRESH_INTERVAL = int(os.getenv("METADATA_REFRESH_INTERVAL", "3600"))    # 0 disables
+METADATA_MAX_AGE          = int(os.getenv("METADATA_MAX_AGE",          str(7 * 24 * 3600)))
+METADATA_REFRESH_BATCH    = int(os.getenv("METADATA_REFRESH_BATCH",    "100"))
+METADATA_LOCK_PATH        = os.getenv("METADATA_LOCK_PATH",        "metadata_refresh.lock")
+METADATA_RETRY_AFTER      = int(os.getenv("METADATA_RETRY_AFTER",      str(24 * 3600)))  # after a failed fetch
+
+FIELDS = ("id", "title", "poster_path", "vote_average", "release_date", "genres", "overview", "popularity")
+
+
+class MetadataStore:
+    """
+    Local SQLite table of movie card fields keyed by TMDB id, so recommendation
+    and list pages can render without calling TMDB. Seeded from the metadata CSV
+    and kept fresh by write-through from TMDB fetches plus a background refresher.
+
+    poster_path is stored as TMDB returns it ("/abc.jpg"), without an image base.
+    updated_at is 0 for rows that have only ever come from the CSV; failed_at is
+    when the refresher last failed to fetch the row (0 if it hasn't).
+    """
+
+    def __init__(self, path=METADATA_DB_PATH):
+        self.path = path
+        self._connect = SQLiteConnections(path)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS movies ("
+                " id INTEGER PRIMARY KEY, title TEXT, poster_path TEXT, vote_average REAL,"
+                " release_date TEXT, genres TEXT, overview TEXT, updated_at REAL NOT NULL DEFAULT 0,"
+                " popularity REAL NOT NULL DEFAULT 0, failed_at REAL NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(movies)")}
+            # databases created before these columns existed
+            if "popularity" not in columns:
+                conn.execute("ALTER TABLE movies ADD COLUMN popularity REAL NOT NULL DEFAULT 0")
+            if "failed_at" not in columns:
+                conn.execute("ALTER TABLE movies ADD COLUMN failed_at REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS movies_updated_at ON movies (updated_at)")
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM movies").fetchone()[0]
+
+    def import_csv(self, csv_path=MOVIE_METADATA_CSV_PATH):
+        """
+        Insert every CSV row not already in the store, using whichever card columns exist.
+        """
+        import pandas as pd
+
+        df = pd.read_csv(csv_path)
+        rows = []
+        for record in df.to_dict("records"):
+            if record.get("id") is None or record.get("id") != record.get("id"):  # missing / NaN
+                continue
+            rows.append(self._row(record, updated_at=0))
+
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO movies"
+                " (id, title, poster_path, vote_average, release_date, genres, overview, popularity, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def upsert(self, card):
+        """
+        Store fields fetched from TMDB for one movie.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO movies"
+                " (id, title, poster_path, vote_average, release_date, genres, overview, popularity, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._row(card, updated_at=time.time())
+            )
+
+    def get_many(self, ids):
+        """
+        Return {id: card} for the ids present in the store.
+        """
+        ids = [int(i) for i in ids]
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        cursor = self._connect().execute(
+            f"SELECT {', '.join(FIELDS)} FROM movies WHERE id IN ({placeholders})", ids
+        )
+        cards = {}
+        for row in cursor:
+            card = dict(zip(FIELDS, row))
+            card["genres"] = json.loads(card["genres"] or "[]")
+            card["title"] = card["title"] or ""
+            card["poster_path"] = card["poster_path"] or ""
+            card["vote_average"] = card["vote_average"] or 0.0
+            card["release_date"] = card["release_date"] or ""
+            card["overview"] = card["overview"] or ""
+            card["popularity"] = card["popularity"] or 0.0
+            cards[card["id"]] = card
+        return cards
+
+    def all_genres(self):
+        """
+        Return {id: [genre names]} for every row that has genres.
+        """
+        cursor = self._connect().execute("SELECT id, genres FROM movies WHERE genres != '[]'")
+        return {row[0]: json.loads(row[1]) for row in cursor}
+
+    def genre_count(self):
+        """
+        Number of rows that have genres (grows as TMDB fetches fill them in).
+        """
+        return self._connect().execute("SELECT COUNT(*) FROM movies WHERE genres != '[]'").fetchone()[0]
+
+    def iter_titles(self):
+        """
+        Yield (id, title, poster_path, release_date, popularity) for every row with a title.
+        """
+        yield from self._connect().execute(
+            "SELECT id, title, poster_path, release_date, popularity FROM movies WHERE title != ''"
+        )
+
+    def stale_ids(self, max_age=METADATA_MAX_AGE, limit=METADATA_REFRESH_BATCH,
+                  retry_after=METADATA_RETRY_AFTER):
+        """
+        Ids whose TMDB fields are older than max_age (CSV-only rows first), skipping
+        rows whose fetch failed within retry_after seconds.
+        """
+        now = time.time()
+        cursor = self._connect().execute(
+            "SELECT id FROM movies WHERE updated_at < ? AND failed_at < ? ORDER BY updated_at LIMIT ?",
+            (now - max_age, now - retry_after, limit)
+        )
+        return [row[0] for row in cursor]
+
+    def mark_failed(self, tmdb_id):
+        """
+        Record a failed refresh, so a deleted or failing id can't hold the front of
+        every batch; the next successful upsert clears it.
+        """
+        with self._connect() as conn:
+            conn.execute("UPDATE movies SET failed_at = ? WHERE id = ?", (time.time(), int(tmdb_id)))
+
+    @staticmethod
+    def _row(record, updated_at):
+        return (
+            int(record["id"]),
+            _text(record.get("title")),
+            _text(record.get("poster_path")),
+            _number(record.get("vote_average")),
+            _text(record.get("release_date")),
+            json.dumps(parse_genres(record.get("genres"))),
+            _text(record.get("overview")),
+            _number(record.get("popularity")),
+            updated_at,
+        )
+
+
+def _text(value):
+    # pandas gives NaN for empty CSV cells
+    if value is None or value != value:
+        return ""
+    return str(value)
+
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if value == value else 0.0
+
+
+def fetch_card(tmdb_id):
+    """
+    Fetch one movie's card fields from TMDB /movie/{id}. Raises requests.RequestException.
+    """
+    data = tmdb.get(f"/movie/{tmdb_id}")
+    poster = data.get("poster_path") or ""
+    if poster and not poster.startswith("/"):
+        poster = "/" + poster
+    return {
+        "id": data.get("id") or tmdb_id,
+        "title": data.get("title", "") or "",
+        "poster_path": poster,
+        "vote_average": data.get("vote_average", 0.0) or 0.0,
+        "release_date": data.get("release_date", "") or "",
+        "genres": [g["name"] for g in data.get("genres", [])],
+        "overview": data.get("overview", "") or "",
+        "popularity": data.get("popularity", 0.0) or 0.0,
+    }
+
+
+def backfill_genres(store, ids):
+    """
+    Fetch from TMDB (on the shared pool) every id in `ids` whose row has no genres yet
+    and write the cards to the store. Meant for build time; returns the number filled.
+    """
+    have = store.all_genres()
+    missing = [int(i) for i in ids if int(i) not in have]
+
+    def fetch_or_none(tmdb_id):
+        try:
+            return fetch_card(tmdb_id)
+        except Exception as e:
+            print(f"Genre backfill error for {tmdb_id}: {e}")
+            return None
+
+    filled = 0
+    for card in tmdb.executor.map(fetch_or_none, missing):
+        if card and card["genres"]:
+            store.upsert(card)
+            filled += 1
+    return filled
+
+
+def refresh_stale(store):
+    """
+    Re-fetch one batch of stale rows from TMDB and write them back to the store;
+    failures are marked so they don't come back in the next batch.
+    """
+    for tmdb_id in store.stale_ids():
+        try:
+            store.upsert(fetch_card(tmdb_id))
+        except Exception as e:
+            print(f"Metadata refresh error for {tmdb_id}: {e}")
+            store.mark_failed(tmdb_id)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_metadata_store():
+    """
+    Return the process-wide store, creating it (importing the CSV into an empty
+    database) on first use, and start this process's refresher, which runs
+    refresh_stale every METADATA_REFRESH_INTERVAL seconds on one worker per node.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = MetadataStore()
+                if store.count() == 0 and os.path.exists(MOVIE_METADATA_CSV_PATH):
+                    store.import_csv()
+                _store = store
+    if METADATA_REFRESH_INTERVAL > 0:
+        start_per_process_daemon("metadata-refresher", lambda: refresh_stale(_store),
+                                 METADATA_REFRESH_INTERVAL, METADATA_LOCK_PATH)
+    return _store
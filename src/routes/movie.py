@@ -1,24 +1,37 @@
 import os
 from datetime import datetime
 from bson import ObjectId
-from functools import lru_cache
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from pymongo import ReturnDocument
+from concurrent.futures import as_completed, TimeoutError as FutureTimeout
 
 import requests
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify, abort
 from flask_login import login_required, current_user
 from dotenv import load_dotenv
 
+from .cache import tmdb_cached, MISS
+from .tmdb_client import tmdb, time_left
+from .metadata_store import get_metadata_store
+from .recommend import record_user_feedback, invalidate_recommendations
+from .list_snapshots import (
+    LIST_FIELDS, basic_card, snapshot_entry, store_snapshot, store_snapshots, ensure_snapshot_refresher
+)
+from src.models.review_stats import record_review, get_review_stats, summarize, stats_id
+
 # -----------------------------------------
-# LOAD ENVIRONMENT & CONFIGURE SESSION
+# LOAD ENVIRONMENT
 # -----------------------------------------
 load_dotenv()
-TMDB_API_KEY = os.getenv("TMDB_API_KEY")
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
 
-# Create a persistent Requests session for TMDB
-session = requests.Session()
-session.headers.update({"Accept": "application/json"})
+# Reviews shown per page on the details view
+REVIEWS_PAGE_SIZE = int(os.getenv("REVIEWS_PAGE_SIZE", "20"))
+# Watchlist/favorites entries enriched and rendered per page
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "24"))
+
+# Fields kept from TMDB payloads in the cached details view model
+SEASON_FIELDS = ("name", "season_number", "episode_count", "air_date", "poster_path")
+RECOMMENDATION_FIELDS = ("id", "media_type", "title", "name", "poster_path",
+                         "release_date", "first_air_date", "vote_average")
 
 
 # -----------------------------------------
@@ -28,30 +41,29 @@ session.headers.update({"Accept": "application/json"})
 def fetch_tmdb_item(item_id: int, item_type: str = "movie", include_details: bool = True):
     """
     Fetch a TMDB item (movie or tv). If include_details=True, append videos, credits, recommendations.
-    Returns the JSON dict or None on error (and flashes error).
+    Returns the JSON dict or None on error (logged). Runs on the TMDB pool's threads,
+    outside any request context, so it must not flash; callers report failures.
     """
     if item_type not in ("movie", "tv"):
-        flash(f"Invalid type '{item_type}' requested.", "error")
+        print(f"Invalid type '{item_type}' requested for item {item_id}")
         return None
 
-    url = f"{TMDB_BASE_URL}/{item_type}/{item_id}?api_key={TMDB_API_KEY}"
+    params = {}
     if include_details:
-        url += "&append_to_response=videos,credits,recommendations"
+        params["append_to_response"] = "videos,credits,recommendations"
 
     try:
-        resp = session.get(url, timeout=5)
-        resp.raise_for_status()
-        return resp.json()
+        return tmdb.get(f"/{item_type}/{item_id}", params)
     except requests.exceptions.RequestException as e:
-        flash(f"Failed to fetch {item_type} details: {e}", "error")
+        print(f"Failed to fetch {item_type} {item_id} details: {e}")
         return None
 
 
-@lru_cache(maxsize=256)
+@tmdb_cached("item")
 def fetch_tmdb_item_cached(item_type: str, item_id: int, include_details: bool = False):
     """
-    LRU-cached wrapper around fetch_tmdb_item(...).
-    Caches by (item_type, item_id, include_details).
+    TTL-cached wrapper around fetch_tmdb_item(...).
+    Caches by (item_type, item_id, include_details); failures are cached briefly.
     """
     return fetch_tmdb_item(item_id, item_type=item_type, include_details=include_details)
 
@@ -60,7 +72,7 @@ def fetch_items_concurrently(item_list: list):
     """
     Given a list of dicts: [{"id": "123", "type": "movie"}, {"id": "456", "type": "tv"}, ...],
     fetch minimal data (no append_to_response). Return a dict mapping (type, id) -> basic fields.
-    Defaults missing 'type' to 'movie'.
+    Defaults missing 'type' to 'movie'. Movies found in the local metadata store skip TMDB.
     """
     def fetch_one(pair):
         _id_str = pair.get("id")
@@ -77,20 +89,16 @@ def fetch_items_concurrently(item_list: list):
         if not raw_data:
             return None
 
-        return {
-            "id": str(raw_data.get("id")),
-            "type": _type,
-            "title": raw_data.get("title") or raw_data.get("name") or "N/A",
-            "poster_path": raw_data.get("poster_path") or "",
-            "vote_average": raw_data.get("vote_average", 0.0) or 0.0,
-            "release_date": raw_data.get("release_date") or raw_data.get("first_air_date") or "",
-        }
+        return basic_card(raw_data, _type)
+
+    fetched = load_stored_cards(item_list)
+    remaining = [p for p in item_list if (p.get("type", "movie"), str(p.get("id"))) not in fetched]
 
-    fetched = {}
-    max_workers = min(len(item_list), 5) if item_list else 1
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(fetch_one, pair): pair for pair in item_list}
-        for fut in as_completed(futures):
+    # Fan out on the TMDB client's shared pool instead of a per-request executor;
+    # entries still pending when the request's deadline passes are left out
+    futures = {tmdb.spawn(fetch_one, pair): pair for pair in remaining}
+    try:
+        for fut in as_completed(futures, timeout=time_left()):
             pair = futures[fut]
             try:
                 result = fut.result()
@@ -99,9 +107,31 @@ def fetch_items_concurrently(item_list: list):
                     fetched[key] = result
             except Exception as e:
                 print(f"Error fetching for pair={pair}: {e}")
+    except FutureTimeout:
+        print(f"Deadline exceeded with {sum(not f.done() for f in futures)} list items pending")
     return fetched
 
 
+def load_stored_cards(item_list: list):
+    """
+    Return {(type, id): basic fields} for the movie entries the local metadata store
+    can render (rows with a poster). TV entries always go to TMDB.
+    """
+    movie_ids = [int(p["id"]) for p in item_list if p.get("id") and p.get("type", "movie") == "movie"]
+    if not movie_ids:
+        return {}
+    try:
+        stored = get_metadata_store().get_many(movie_ids)
+    except Exception as e:
+        print(f"Metadata store read error: {e}")
+        return {}
+
+    return {
+        ("movie", str(tmdb_id)): basic_card(row, "movie")
+        for tmdb_id, row in stored.items() if row.get("poster_path")
+    }
+
+
 def process_base_fields(raw: dict, item_type: str):
     """
     Normalize common fields for movie or tv:
@@ -143,7 +173,9 @@ def process_base_fields(raw: dict, item_type: str):
         base["first_air_date"] = raw.get("first_air_date") or ""
         base["episode_run_time"] = raw.get("episode_run_time", [])
         base["runtime"] = raw.get("episode_run_time", [0])[0] if raw.get("episode_run_time") else 0
-        base["seasons"] = raw.get("seasons", [])
+        base["seasons"] = [
+            {k: season.get(k) for k in SEASON_FIELDS} for season in raw.get("seasons", [])
+        ]
         base["number_of_seasons"] = raw.get("number_of_seasons", 0)
         base["number_of_episodes"] = raw.get("number_of_episodes", 0)
 
@@ -193,57 +225,152 @@ def process_trailer(raw: dict):
 
 def process_recommendations(raw: dict):
     """
-    Return raw["recommendations"]["results"] or empty list.
+    Return raw["recommendations"]["results"] trimmed to the fields the cards render,
+    or empty list.
+    """
+    return [
+        {k: rec.get(k) for k in RECOMMENDATION_FIELDS if rec.get(k) is not None}
+        for rec in raw.get("recommendations", {}).get("results", [])
+    ]
+
+
+@tmdb_cached("details_view", maxsize=2048)
+def fetch_details_view(item_type: str, item_id: int):
+    """
+    Processed view model for the details page: base fields, director/creators and
+    top cast, trailer key and trimmed recommendation cards. Cached with a TTL, so a
+    repeat view skips both the large append_to_response call and the processing.
+    Returns None if TMDB fails (cached briefly).
+    """
+    if item_type not in ("movie", "tv"):
+        return None
+
+    params = {"append_to_response": "videos,credits,recommendations"}
+    try:
+        raw = tmdb.get(f"/{item_type}/{item_id}", params)
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to fetch {item_type} {item_id} details: {e}")
+        return None
+
+    base = process_base_fields(raw, item_type)
+    if not base:
+        return None
+    return {
+        "item": base,
+        "crew_cast": process_crew_and_cast(raw, item_type),
+        "trailer_key": process_trailer(raw),
+        "recommendations": process_recommendations(raw),
+    }
+
+
+REVIEW_FIELDS = {"review": 1, "rating": 1, "timestamp": 1, "user": 1, "user_id": 1}
+
+
+def review_cursor(review: dict) -> str:
+    """
+    Opaque keyset cursor for the position just after `review`: "<timestamp>_<_id>".
+    """
+    return f"{review['timestamp'].isoformat()}_{review['_id']}"
+
+
+def after_cursor(cursor: str):
+    """
+    Filter for reviews strictly older than the cursor in (timestamp, _id) desc order,
+    or None if the cursor is malformed.
+    """
+    try:
+        ts, oid = cursor.rsplit("_", 1)
+        ts, oid = datetime.fromisoformat(ts), ObjectId(oid)
+    except Exception:
+        return None
+    return {"$or": [{"timestamp": {"$lt": ts}}, {"timestamp": ts, "_id": {"$lt": oid}}]}
+
+
+def review_page(reviews: list):
+    """
+    Split a fetch of REVIEWS_PAGE_SIZE + 1 reviews into (page, next cursor or None).
+    """
+    page = reviews[:REVIEWS_PAGE_SIZE]
+    more = len(reviews) > REVIEWS_PAGE_SIZE
+    return page, review_cursor(page[-1]) if more else None
+
+
+def list_contains(field: str, id_str: str, item_type: str):
+    """
+    Aggregation expression: whether the user's `field` array holds (id, type).
+    Evaluated server-side, so the array itself is never sent to the app.
     """
-    return raw.get("recommendations", {}).get("results", [])
+    return {"$anyElementTrue": [{"$map": {
+        "input": {"$ifNull": [f"${field}", []]},
+        "in": {"$and": [{"$eq": ["$$this.id", id_str]}, {"$eq": ["$$this.type", item_type]}]}
+    }}]}
 
 
 def fetch_user_data(user_id: str, item_id: int = None, item_type: str = "movie"):
     """
     Fetch user-specific flags: whether item is in watchlist/favorites,
-    whether user liked/disliked, and reviews for this item.
+    whether user liked/disliked, and the latest reviews for this item.
+    One aggregation round trip: list membership is computed in the query and the
+    reaction/reviews come from $lookup subpipelines (reviews limited to a page).
     """
     db = current_app.config["db"]
-    user = db.users.find_one(
-        {"_id": ObjectId(user_id)},
-        {"watchlist": 1, "favorites": 1}
-    )
 
     user_data = {
         "item_in_watchlist": False,
         "item_in_favorites": False,
         "user_like": False,
         "user_dislike": False,
-        "reviews": []
+        "reviews": [],
+        "reviews_cursor": None
     }
-
-    if user and item_id is not None:
-        id_str = str(item_id)
-        watchlist = user.get("watchlist", [])
-        favorites = user.get("favorites", [])
-
-        user_data["item_in_watchlist"] = any(
-            (m.get("id") == id_str and m.get("type") == item_type)
-            for m in watchlist
+    if item_id is None:
+        return user_data
+
+    id_str = str(item_id)
+    item_match = {"item_id": id_str, "item_type": item_type}
+    result = next(db.users.aggregate([
+        {"$match": {"_id": ObjectId(user_id)}},
+        {"$project": {
+            "_id": 0,
+            "item_in_watchlist": list_contains("watchlist", id_str, item_type),
+            "item_in_favorites": list_contains("favorites", id_str, item_type)
+        }},
+        {"$lookup": {
+            "from": "likes",
+            "pipeline": [
+                {"$match": {"user_id": user_id, **item_match}},
+                {"$limit": 1},
+                {"$project": {"_id": 0, "type": 1}}
+            ],
+            "as": "reaction"
+        }},
+        {"$lookup": {
+            "from": "reviews",
+            "pipeline": [
+                {"$match": item_match},
+                {"$sort": {"timestamp": -1, "_id": -1}},
+                {"$limit": REVIEWS_PAGE_SIZE + 1},
+                {"$project": REVIEW_FIELDS}
+            ],
+            "as": "reviews"
+        }},
+        {"$lookup": {
+            "from": "review_stats",
+            "pipeline": [{"$match": {"_id": stats_id(item_type, item_id)}}],
+            "as": "review_stats"
+        }}
+    ]), None)
+
+    if result:
+        reaction = result["reaction"][0].get("type") if result["reaction"] else None
+        user_data.update(
+            item_in_watchlist=result["item_in_watchlist"],
+            item_in_favorites=result["item_in_favorites"],
+            user_like=reaction == "like",
+            user_dislike=reaction == "dislike",
         )
-        user_data["item_in_favorites"] = any(
-            (m.get("id") == id_str and m.get("type") == item_type)
-            for m in favorites
-        )
-
-        reaction = db.likes.find_one({
-            "user_id": user_id,
-            "item_id": id_str,
-            "item_type": item_type
-        })
-        if reaction:
-            user_data["user_like"] = reaction.get("type") == "like"
-            user_data["user_dislike"] = reaction.get("type") == "dislike"
-
-        user_data["reviews"] = list(db.reviews.find(
-            {"item_id": id_str, "item_type": item_type},
-            {"review": 1, "rating": 1, "timestamp": 1, "user": 1, "_id": 1}
-        ).sort("timestamp", -1))
+        user_data["reviews"], user_data["reviews_cursor"] = review_page(result["reviews"])
+        user_data["review_stats"] = summarize(result["review_stats"][0] if result["review_stats"] else None)
 
     return user_data
 
@@ -261,72 +388,194 @@ def movie_details(item_type, item_id):
     /movie/details/movie/550
     /movie/details/tv/1399
     """
-    raw = fetch_tmdb_item(item_id, item_type=item_type, include_details=True)
-    if not raw:
-        return redirect(url_for('main.index'))
+    if item_type not in ("movie", "tv"):
+        abort(404)
 
-    base = process_base_fields(raw, item_type)
-    if not base:
-        flash("Error processing basic fields.", "error")
+    view = fetch_details_view(item_type, item_id)
+    if not view:
+        flash(f"Failed to fetch {item_type} details. Please try again later.", "error")
         return redirect(url_for('main.index'))
 
-    crew_cast = process_crew_and_cast(raw, item_type)
-    trailer_key = process_trailer(raw)
-    recommendations = process_recommendations(raw)
-
     user_data = {}
     if current_user.is_authenticated:
         user_data = fetch_user_data(current_user.get_id(), item_id, item_type)
+    if "review_stats" not in user_data:
+        user_data["review_stats"] = get_review_stats(current_app.config["db"], item_type, item_id)
 
     return render_template(
         "home/details.html",
-        item=base,
-        crew_cast=crew_cast,
-        trailer_key=trailer_key,
-        recommendations=recommendations,
+        item=view["item"],
+        crew_cast=view["crew_cast"],
+        trailer_key=view["trailer_key"],
+        recommendations=view["recommendations"],
         is_authenticated=current_user.is_authenticated,
         **user_data
     )
 
 
-@movie_bp.route('/watchlist')
-@login_required
-def watchlist():
+@movie_bp.route('/reviews/<string:item_type>/<int:item_id>', methods=['GET'])
+def reviews_page(item_type, item_id):
+    """
+    JSON page of reviews for an item, newest first. Pass the previous page's
+    next_cursor as ?cursor= to continue (keyset pagination on timestamp, _id).
+    """
     db = current_app.config["db"]
-    user = db.users.find_one(
-        {"_id": ObjectId(current_user.get_id())},
-        {"watchlist": 1}
-    )
-    watchlist = user.get("watchlist", [])
-    fetched = fetch_items_concurrently(watchlist)
+    query = {"item_id": str(item_id), "item_type": item_type}
+    cursor = request.args.get("cursor")
+    if cursor:
+        after = after_cursor(cursor)
+        if after is None:
+            return jsonify({"error": "invalid cursor"}), 400
+        query.update(after)
+
+    reviews = list(db.reviews.find(query, REVIEW_FIELDS)
+                   .sort([("timestamp", -1), ("_id", -1)])
+                   .limit(REVIEWS_PAGE_SIZE + 1))
+    page, next_cursor = review_page(reviews)
+    user_id = current_user.get_id() if current_user.is_authenticated else None
+    return jsonify({
+        "reviews": [{
+            "id": str(r["_id"]),
+            "review": r.get("review", ""),
+            "rating": r.get("rating", 0),
+            "timestamp": r["timestamp"].strftime('%b %d, %Y %H:%M'),
+            "user": r.get("user", {}),
+            "own": user_id is not None and r.get("user_id") == user_id
+        } for r in page],
+        "next_cursor": next_cursor
+    })
+
+
+def fetch_list_page(user_id: str, field: str, page: int):
+    """
+    One page of the user's `field` list plus its total length, sliced server-side
+    so only LIST_PAGE_SIZE entries cross the wire.
+    """
+    db = current_app.config["db"]
+    items = {"$ifNull": [f"${field}", []]}
+    result = next(db.users.aggregate([
+        {"$match": {"_id": ObjectId(user_id)}},
+        {"$project": {
+            "_id": 0,
+            "entries": {"$slice": [items, (page - 1) * LIST_PAGE_SIZE, LIST_PAGE_SIZE]},
+            "total": {"$size": items}
+        }}
+    ]), None)
+    if not result:
+        return [], 0
+    return result["entries"], result["total"]
+
+
+def list_page_cards(field: str, page: int):
+    """
+    Cards for one page of the current user's list (in list order), the next page
+    number (None on the last page) and how many entries couldn't be loaded. Entries render from their stored card snapshot;
+    only older entries without one are fetched, and the fetched cards are stored as
+    their snapshots (entries that failed are left to the refresher).
+    """
+    db = current_app.config["db"]
+    user_id = current_user.get_id()
+    ensure_snapshot_refresher(db)
+    entries, total = fetch_list_page(user_id, field, page)
+
+    missing = [pair for pair in entries if not pair.get("card")]
+    fetched = fetch_items_concurrently(missing) if missing else {}
+    if fetched:
+        now = datetime.utcnow()
+        try:
+            store_snapshots(db, ObjectId(user_id), field,
+                            {key: {**card, "snapshot_at": now} for key, card in fetched.items()})
+        except Exception as e:
+            print(f"Snapshot write error for {field}: {e}")
 
     cards = []
-    for pair in watchlist:
+    for pair in entries:
+        card = pair.get("card")
+        if card:
+            cards.append({k: v for k, v in card.items() if k != "snapshot_at"})
+            continue
         key = (pair.get("type", "movie"), str(pair.get("id")))
         if key in fetched:
             cards.append(fetched[key])
 
-    return render_template("home/watchlist.html", cards=cards)
+    next_page = page + 1 if page * LIST_PAGE_SIZE < total else None
+    return cards, next_page, len(entries) - len(cards)
+
+
+@movie_bp.route('/watchlist')
+@login_required
+def watchlist():
+    page = max(request.args.get("page", 1, type=int), 1)
+    cards, next_page, missing = list_page_cards("watchlist", page)
+    if missing:
+        flash("Some items couldn't be loaded right now.", "error")
+    return render_template("home/watchlist.html", cards=cards, next_page=next_page, list_name="watchlist")
 
 
 @movie_bp.route('/favorites')
 @login_required
 def favorites():
-    db = current_app.config["db"]
-    user = db.users.find_one(
-        {"_id": ObjectId(current_user.get_id())},
-        {"favorites": 1}
-    )
-    favorites = user.get("favorites", [])
-    fetched = fetch_items_concurrently(favorites)
+    page = max(request.args.get("page", 1, type=int), 1)
+    cards, next_page, missing = list_page_cards("favorites", page)
+    if missing:
+        flash("Some items couldn't be loaded right now.", "error")
+    return render_template("home/favorites.html", cards=cards, next_page=next_page, list_name="favorites")
 
-    cards = []
-    for pair in favorites:
-        key = (pair.get("type", "movie"), str(pair.get("id")))
-        if key in fetched:
-            cards.append(fetched[key])
 
-    return render_template("home/favorites.html", cards=cards)
+@movie_bp.route('/list/<string:list_name>', methods=['GET'])
+@login_required
+def list_page(list_name):
+    """
+    JSON page of watchlist/favorites cards for infinite scroll: ?page=N. `missing`
+    counts entries that couldn't be loaded (nothing is flashed for these requests).
+    """
+    if list_name not in LIST_FIELDS:
+        return jsonify({"error": "unknown list"}), 404
+    page = max(request.args.get("page", 1, type=int), 1)
+    cards, next_page, missing = list_page_cards(list_name, page)
+    return jsonify({"cards": cards, "next_page": next_page, "missing": missing})
+
+
+def wants_json():
+    return request.accept_mimetypes.best == "application/json"
+
+
+def snapshot_new_entry(db, user_id: str, field: str, item_type: str, item_id: int):
+    """
+    Attach a card snapshot to a just-added list entry so list pages render from Mongo
+    alone. Toggles come from the details page, whose cached view model usually has
+    the card already; otherwise it is fetched off the request path.
+    """
+    view = fetch_details_view.peek(item_type, item_id)
+    if view and view is not MISS:
+        card = {**basic_card(view["item"], item_type), "snapshot_at": datetime.utcnow()}
+        store_snapshot(db, ObjectId(user_id), field, item_type, item_id, card)
+    else:
+        tmdb.executor.submit(snapshot_entry, db, ObjectId(user_id), field, item_type, item_id)
+
+
+def toggle_list_entry(db, user_id: str, field: str, entry: dict):
+    """
+    Atomically add `entry` to the user's `field` array if absent, else remove it,
+    in one server-side update (no read-modify-write race between tabs).
+    Returns True if the entry is now in the list, False if removed, None if no such user.
+    """
+    current = {"$ifNull": [f"${field}", []]}
+    # Entries are matched on id + type only, so extra fields stored with them don't matter
+    same = {"$and": [{"$eq": ["$$this.id", entry["id"]]}, {"$eq": ["$$this.type", entry["type"]]}]}
+    updated = db.users.find_one_and_update(
+        {"_id": ObjectId(user_id)},
+        [{"$set": {field: {"$cond": [
+            {"$anyElementTrue": [{"$map": {"input": current, "in": same}}]},
+            {"$filter": {"input": current, "cond": {"$not": [same]}}},
+            {"$concatArrays": [current, [entry]]}
+        ]}}}],
+        projection={field: {"$elemMatch": {"id": entry["id"], "type": entry["type"]}}},
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        return None
+    return bool(updated.get(field))
 
 
 @movie_bp.route('/toggle-watchlist/<string:item_type>/<int:item_id>', methods=['POST'])
@@ -334,28 +583,21 @@ def favorites():
 def toggle_watchlist(item_type, item_id):
     db = current_app.config["db"]
     user_id = current_user.get_id()
-    obj_id = ObjectId(user_id)
 
-    user = db.users.find_one({"_id": obj_id})
-    if not user:
-        flash("User not found", "error")
-        return redirect(url_for("movie.movie_details", item_type=item_type, item_id=item_id))
-
-    current_watchlist = user.get("watchlist", [])
     entry = {"id": str(item_id), "type": item_type}
-
-    if entry in current_watchlist:
-        updated_watchlist = [i for i in current_watchlist if i != entry]
-        flash("Removed from watchlist", "info")
-    else:
-        updated_watchlist = current_watchlist + [entry]
+    added = toggle_list_entry(db, user_id, "watchlist", entry)
+    if added:
+        snapshot_new_entry(db, user_id, "watchlist", item_type, item_id)
+    invalidate_recommendations(db, user_id)
+
+    if wants_json():
+        return jsonify({"in_watchlist": added}), 404 if added is None else 200
+    if added is None:
+        flash("User not found", "error")
+    elif added:
         flash("Added to watchlist", "success")
-
-    db.users.update_one(
-        {"_id": obj_id},
-        {"$set": {"watchlist": updated_watchlist}}
-    )
-
+    else:
+        flash("Removed from watchlist", "info")
     return redirect(url_for("movie.movie_details", item_type=item_type, item_id=item_id))
 
 @movie_bp.route('/toggle-favorite/<string:item_type>/<int:item_id>', methods=['POST'])
@@ -363,28 +605,21 @@ def toggle_watchlist(item_type, item_id):
 def toggle_favorite(item_type, item_id):
     db = current_app.config["db"]
     user_id = current_user.get_id()
-    obj_id = ObjectId(user_id)
 
-    user = db.users.find_one({"_id": obj_id})
-    if not user:
-        flash("User not found", "error")
-        return redirect(url_for("movie.movie_details", item_type=item_type, item_id=item_id))
-
-    current_favorites = user.get("favorites", [])
     entry = {"id": str(item_id), "type": item_type}
-
-    if entry in current_favorites:
-        updated_favorites = [i for i in current_favorites if i != entry]
-        flash("Removed from favorites", "info")
-    else:
-        updated_favorites = current_favorites + [entry]
+    added = toggle_list_entry(db, user_id, "favorites", entry)
+    if added:
+        snapshot_new_entry(db, user_id, "favorites", item_type, item_id)
+    invalidate_recommendations(db, user_id)
+
+    if wants_json():
+        return jsonify({"in_favorites": added}), 404 if added is None else 200
+    if added is None:
+        flash("User not found", "error")
+    elif added:
         flash("Added to favorites", "success")
-
-    db.users.update_one(
-        {"_id": obj_id},
-        {"$set": {"favorites": updated_favorites}}
-    )
-
+    else:
+        flash("Removed from favorites", "info")
     return redirect(url_for("movie.movie_details", item_type=item_type, item_id=item_id))
 
 
@@ -399,6 +634,7 @@ def like_item(item_type, item_id):
         {"$set": {"type": "like"}},
         upsert=True
     )
+    record_user_feedback(db, user_id, item_type)
     flash("You liked this item!", "success")
     return redirect(url_for("movie.movie_details", item_type=item_type, item_id=item_id))
 
@@ -414,6 +650,7 @@ def dislike_item(item_type, item_id):
         {"$set": {"type": "dislike"}},
         upsert=True
     )
+    record_user_feedback(db, user_id, item_type)
     flash("You disliked this item!", "info")
     return redirect(url_for("movie.movie_details", item_type=item_type, item_id=item_id))
 
@@ -436,6 +673,7 @@ def submit_review(item_type, item_id):
         "review": review_text,
         "rating": int(rating),
         "timestamp": datetime.utcnow(),
+        "counted": True,  # included in review_stats, so deleting it must subtract it
         "user": {
             "name": current_user.name,
             "profile_pic": os.path.basename(current_user.profile_pic) if current_user.profile_pic else None
@@ -444,6 +682,8 @@ def submit_review(item_type, item_id):
 
     try:
         db.reviews.insert_one(review_data)
+        record_review(db, item_type, item_id, int(rating))
+        record_user_feedback(db, current_user.get_id(), item_type)
         flash("Review submitted successfully!", "success")
     except Exception as e:
         flash(f"Failed to submit review: {e}", "error")
@@ -460,7 +700,11 @@ def delete_review(review_id):
     if review and review.get("user_id") == current_user.get_id():
         item_type = review.get("item_type", "movie")
         item_id = int(review.get("item_id"))
-        db.reviews.delete_one({"_id": ObjectId(review_id)})
+        # Reviews from before review_stats existed were never added to it
+        if db.reviews.delete_one({"_id": ObjectId(review_id)}).deleted_count \
+                and review.get("rating") and review.get("counted"):
+            record_review(db, item_type, review["item_id"], int(review["rating"]), delta=-1)
+        record_user_feedback(db, current_user.get_id(), item_type)
         flash("Review deleted!", "success")
         return redirect(url_for("movie.movie_details", item_type=item_type, item_id=item_id))
 
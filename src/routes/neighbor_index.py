@@ -0,0 +1,133 @@
+# src/routes/neighbor_index.py
+import os
+import argparse
+
+import numpy as np
+
+# Text columns used when building from the metadata CSV (whichever are present)
+TEXT_COLUMNS = ["overview", "genres", "keywords", "tagline", "cast", "director", "tags"]
+
+
+class NeighborIndex:
+    """
+    Top-K content neighbors per movie, stored as compact (N, K) arrays:
+    int32 neighbor row ids and float16 similarity scores, best first.
+    Replaces the dense N x N similarity matrix at request time.
+    """
+
+    def __init__(self, neighbors, scores):
+        self.neighbors = neighbors
+        self.scores = scores
+
+    def __len__(self):
+        return self.neighbors.shape[0]
+
+    @property
+    def k(self):
+        return self.neighbors.shape[1]
+
+    def lookup(self, row, n=5):
+        """
+        Return the row ids of the n most similar movies to `row` (excluding itself).
+        """
+        return self.neighbors[row, :n]
+
+    @classmethod
+    def from_similarity(cls, sim, k=50, chunk_size=1024):
+        """
+        Build from a dense (possibly memory-mapped) similarity matrix, a chunk of rows at a time.
+        """
+        n_rows = sim.shape[0]
+        k = min(k, n_rows - 1)
+        neighbors = np.empty((n_rows, k), dtype=np.int32)
+        scores = np.empty((n_rows, k), dtype=np.float16)
+
+        for start in range(0, n_rows, chunk_size):
+            stop = min(start + chunk_size, n_rows)
+            block = np.array(sim[start:stop], dtype=np.float32)
+            _top_k_into(block, start, k, neighbors[start:stop], scores[start:stop])
+
+        return cls(neighbors, scores)
+
+    @classmethod
+    def from_metadata_csv(cls, csv_path, k=50, chunk_size=1024):
+        """
+        Build from the movie metadata CSV using TF-IDF cosine similarity over its text columns.
+        Row order matches the CSV, as in movies_df.
+        """
+        import pandas as pd
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        df = pd.read_csv(csv_path)
+        columns = [c for c in TEXT_COLUMNS if c in df.columns] or ["title"]
+        corpus = df[columns].fillna("").astype(str).agg(" ".join, axis=1)
+
+        # TF-IDF rows are L2-normalised, so the dot product is the cosine similarity
+        tfidf = TfidfVectorizer(stop_words="english").fit_transform(corpus)
+
+        n_rows = tfidf.shape[0]
+        k = min(k, n_rows - 1)
+        neighbors = np.empty((n_rows, k), dtype=np.int32)
+        scores = np.empty((n_rows, k), dtype=np.float16)
+
+        for start in range(0, n_rows, chunk_size):
+            stop = min(start + chunk_size, n_rows)
+            block = (tfidf[start:stop] @ tfidf.T).toarray().astype(np.float32)
+            _top_k_into(block, start, k, neighbors[start:stop], scores[start:stop])
+
+        return cls(neighbors, scores)
+
+    def save(self, path):
+        """
+        Write to exactly `path`, atomically: concurrent readers (or workers racing to
+        save the same build) never see a partial file.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, neighbors=self.neighbors, scores=self.scores)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["neighbors"], data["scores"])
+
+
+def _top_k_into(block, start, k, out_neighbors, out_scores):
+    """
+    Write the top-k columns of each row of `block` (rows start..start+len) into the outputs,
+    skipping each row's own column.
+    """
+    rows = np.arange(block.shape[0])
+    block[rows, rows + start] = -np.inf
+
+    top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(block, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+
+    out_neighbors[:] = np.take_along_axis(top, order, axis=1)
+    out_scores[:] = np.take_along_axis(top_scores, order, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the top-K content neighbor index.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--from-matrix", help="dense similarity matrix (.joblib)")
+    source.add_argument("--from-csv", help="movie metadata CSV")
+    parser.add_argument("--out", default="content_neighbors.npz", help="output .npz path")
+    parser.add_argument("-k", type=int, default=50, help="neighbors kept per movie")
+    args = parser.parse_args()
+
+    if args.from_matrix:
+        import joblib
+        sim = joblib.load(args.from_matrix, mmap_mode="r")
+        index = NeighborIndex.from_similarity(sim, k=args.k)
+    else:
+        index = NeighborIndex.from_metadata_csv(args.from_csv, k=args.k)
+
+    index.save(args.out)
+    print(f"Wrote {len(index)} x {index.k} neighbors to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+# src/routes/online_learner.py
+import os
+import time
+import zlib
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .cache import TTLCache, MISS
+from .artifacts import has_arrays, load_arrays, save_arrays
+from .daemons import node_lock, start_per_process_daemon
+
+load_dotenv()
+
+# ── Online learning configuration from .env ──────────────────────────────────────
+ONLINE_REGULARIZATION = float(os.getenv("ONLINE_REGULARIZATION", "0.1"))
+USER_FACTORS_TTL      = int(os.getenv("USER_FACTORS_TTL", "60"))       # local cache of folded vectors
+RETRAIN_INTERVAL      = int(os.getenv("RETRAIN_INTERVAL", "0"))         # seconds; 0 disables
+RETRAIN_CHECK_EVERY   = int(os.getenv("RETRAIN_CHECK_EVERY", "60"))     # model-file change polling
+RATINGS_CSV_PATH      = os.getenv("RATINGS_CSV_PATH", "")               # base ratings the model was trained on
+RETRAIN_LOCK_PATH     = os.getenv("RETRAIN_LOCK_PATH", "retrain.lock")
+MONGO_URI             = os.getenv("MONGO_URI")
+
+# One solver thread per process, shared by every learner (a reload swaps the learner,
+# not the thread); recreated in forked children, whose copy has no thread behind it
+_solver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="online-learner")
+
+
+def _reset_solver():
+    global _solver
+    _solver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="online-learner")
+
+
+os.register_at_fork(after_in_child=_reset_solver)
+
+
+def model_version(scorer):
+    """
+    Fingerprint of the scorer's item factors; user vectors solved against other
+    factors are stale. Identical on every node that loads the same model.
+    """
+    factors = np.ascontiguousarray(scorer.item_factors)
+    return f"{zlib.crc32(factors.tobytes()):08x}-{factors.shape[1]}"
+
+
+def user_ratings(db, user_id, rating_scale):
+    """
+    Collect a user's explicit signals for movies as {tmdb_id: rating} on the model's scale:
+    like → top of scale, dislike → bottom, 1-5 star reviews mapped linearly.
+    An item with several signals gets their mean.
+    """
+    lower, upper = rating_scale
+    signals = {}
+
+    for like in db.likes.find({"user_id": user_id, "item_type": "movie"}, {"item_id": 1, "type": 1}):
+        rating = upper if like.get("type") == "like" else lower
+        signals.setdefault(int(like["item_id"]), []).append(rating)
+
+    for review in db.reviews.find({"user_id": user_id, "item_type": "movie"}, {"item_id": 1, "rating": 1}):
+        stars = review.get("rating")
+        if stars:
+            rating = lower + (int(stars) - 1) / 4 * (upper - lower)
+            signals.setdefault(int(review["item_id"]), []).append(rating)
+
+    return {item: sum(r) / len(r) for item, r in signals.items()}
+
+
+class OnlineLearner:
+    """
+    Folds users' likes/dislikes/reviews into the collaborative model without retraining:
+    a user's bias and latent vector are solved by regularized least squares against the
+    fixed item factors of the current SVDScorer.
+
+    Solves run on a single background thread; results are persisted to the
+    `user_factors` collection so every worker can use them, with a short local cache.
+    """
+
+    def __init__(self, scorer, catalog, regularization=ONLINE_REGULARIZATION, on_update=None):
+        self.scorer = scorer
+        self.catalog = catalog
+        self.version = model_version(scorer)  # item factors the stored vectors were solved against
+        self.regularization = regularization
+        self.on_update = on_update  # called with (db, user_id) once a new vector is visible
+        # Shared between workers when TMDB_CACHE_PATH is set, so an update is seen everywhere
+        self.cache = TTLCache(f"user_factors:{self.version}", USER_FACTORS_TTL, maxsize=10_000,
+                              is_negative=lambda value: False)
+
+    def fold_in(self, ratings):
+        """
+        Solve (bias, factors) for {tmdb_id: rating}. Returns None if no rated item is known
+        to the model.
+        """
+        rows = [self.catalog.row_by_id.get(item) for item in ratings]
+        pairs = [(row, r) for row, r in zip(rows, ratings.values())
+                 if row is not None and self.scorer.item_known[row]]
+        if not pairs:
+            return None
+
+        rows = np.array([row for row, _ in pairs])
+        y = np.array([r for _, r in pairs], dtype=np.float64)
+        q = np.asarray(self.scorer.item_factors[rows])
+
+        if self.scorer.biased:
+            y = y - self.scorer.global_mean - self.scorer.item_bias[rows]
+            x = np.hstack([np.ones((len(rows), 1)), q])
+        else:
+            x = q
+
+        a = x.T @ x + self.regularization * np.eye(x.shape[1])
+        w = np.linalg.solve(a, x.T @ y)
+        if self.scorer.biased:
+            return float(w[0]), w[1:]
+        return 0.0, w
+
+    def schedule_update(self, db, user_id):
+        """
+        Re-solve the user's vector in the background (never blocks the request thread).
+        """
+        _solver.submit(self._update, db, user_id)
+
+    def _update(self, db, user_id):
+        try:
+            vector = self.fold_in(user_ratings(db, user_id, self.scorer.rating_scale))
+            if vector is None:
+                db.user_factors.delete_one({"_id": user_id})
+                self.cache.set(user_id, None)
+            else:
+                bias, factors = vector
+                db.user_factors.update_one(
+                    {"_id": user_id},
+                    {"$set": {"bias": bias, "factors": factors.tolist(),
+                              "version": self.version, "updated_at": datetime.utcnow()}},
+                    upsert=True
+                )
+                self.cache.set(user_id, [bias, factors.tolist()])
+            if self.on_update is not None:
+                self.on_update(db, user_id)
+        except Exception as e:
+            print(f"Online update failed for user {user_id}: {e}")
+
+    def user_vector(self, db, user_id):
+        """
+        (bias, factors array) for the user, or None if nothing has been folded in
+        for the current model yet.
+        """
+        cached = self.cache.get(user_id)
+        if cached is MISS:
+            doc = db.user_factors.find_one({"_id": user_id})
+            cached = None
+            if doc and doc.get("version") == self.version:
+                cached = [doc["bias"], doc["factors"]]
+            elif doc:
+                # Solved against older item factors: refresh for the current model
+                self.schedule_update(db, user_id)
+            self.cache.set(user_id, cached)
+        if cached is None:
+            return None
+        return cached[0], np.asarray(cached[1])
+
+
+# ── Periodic full retrain ────────────────────────────────────────────────────────
+
+def retrain_collaborative_model(mongo_uri, model_path, ratings_csv_path, artifact_dir):
+    """
+    Retrain the Surprise SVD on the base ratings plus every user's likes/reviews and
+    atomically replace model_path (and the svd/ arrays in artifact_dir, if exported).
+    Runs in a separate process.
+    """
+    import joblib
+    import pandas as pd
+    from pymongo import MongoClient
+    from surprise import SVD, Dataset, Reader
+    from .svd_scorer import SVDScorer
+
+    old = joblib.load(model_path)
+    lower, upper = old.trainset.rating_scale
+
+    base = pd.read_csv(ratings_csv_path)
+    base = base.rename(columns={"userId": "user", "user_id": "user", "movieId": "item", "movie_id": "item"})
+    frames = [base[["user", "item", "rating"]]]
+
+    db = MongoClient(mongo_uri)["movie_recommendation"]
+    user_ids = set(db.likes.distinct("user_id", {"item_type": "movie"}))
+    user_ids |= set(db.reviews.distinct("user_id", {"item_type": "movie"}))
+    rows = []
+    for user_id in user_ids:
+        for item, rating in user_ratings(db, user_id, (lower, upper)).items():
+            rows.append((user_id, item, rating))
+    frames.append(pd.DataFrame(rows, columns=["user", "item", "rating"]))
+
+    ratings = pd.concat(frames, ignore_index=True)
+    ratings["user"] = ratings["user"].astype(str)  # one raw-id type for base and Mongo users
+    ratings["item"] = ratings["item"].astype(int)
+
+    data = Dataset.load_from_df(ratings, Reader(rating_scale=(lower, upper)))
+    model = SVD(n_factors=old.n_factors, n_epochs=old.n_epochs, biased=old.biased)
+    model.fit(data.build_full_trainset())
+
+    # Arrays first: workers reload once model_path changes
+    catalog_dir = os.path.join(artifact_dir, "catalog")
+    if has_arrays(catalog_dir) and has_arrays(os.path.join(artifact_dir, "svd")):
+        movie_ids = load_arrays(catalog_dir)["ids"].tolist()
+        save_arrays(os.path.join(artifact_dir, "svd"), **SVDScorer.from_surprise(model, movie_ids).to_arrays())
+
+    tmp_path = model_path + ".tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, model_path)
+
+
+def start_retrain_scheduler(model_path, artifact_dir, reload_model, interval=RETRAIN_INTERVAL):
+    """
+    Start this process's daemon thread that (1) every `interval` seconds runs
+    retrain_collaborative_model in a spawned process, with a file lock and the model
+    file's mtime so only one process per node retrains per interval, and (2) calls
+    reload_model() whenever model_path changes on disk, so every worker picks it up.
+    """
+    def model_mtime():
+        try:
+            return os.path.getmtime(model_path)
+        except OSError:
+            return None
+
+    def run():
+        seen_mtime = model_mtime()
+        next_retrain = time.time() + interval
+        while True:
+            time.sleep(RETRAIN_CHECK_EVERY)
+
+            if interval > 0 and RATINGS_CSV_PATH and time.time() >= next_retrain:
+                next_retrain = time.time() + interval
+                with node_lock(RETRAIN_LOCK_PATH) as held:
+                    # Not held: another process on this node is retraining. Every worker runs
+                    # its own timer, so one firing just after another worker's retrain
+                    # released the lock finds a fresh model file and skips as well
+                    mtime = model_mtime()
+                    if held and (mtime is None or mtime <= time.time() - interval):
+                        ctx = multiprocessing.get_context("spawn")
+                        proc = ctx.Process(target=retrain_collaborative_model,
+                                           args=(MONGO_URI, model_path, RATINGS_CSV_PATH, artifact_dir),
+                                           daemon=True)
+                        proc.start()
+                        proc.join()
+                        if proc.exitcode != 0:
+                            print(f"Collaborative model retrain failed (exit code {proc.exitcode})")
+
+            mtime = model_mtime()
+            if mtime is not None and mtime != seen_mtime:
+                seen_mtime = mtime
+                try:
+                    reload_model()
+                except Exception as e:
+                    print(f"Collaborative model reload failed: {e}")
+
+    start_per_process_daemon("retrain-scheduler", run)
@@ -1,12 +1,24 @@
 import os
+import time
+import threading
+from concurrent.futures import wait
 from flask import Blueprint, render_template, request, jsonify, current_app
 from flask_login import login_required, current_user
-from functools import lru_cache
+from bson import ObjectId
 from dotenv import load_dotenv
-import requests
-import pandas as pd
+import numpy as np
 import joblib
 from .utils import clean_text
+from .cache import tmdb_cached, TTLCache, MISS
+from .tmdb_client import tmdb, time_left
+from .metadata_store import get_metadata_store, fetch_card
+from .svd_scorer import SVDScorer
+from .neighbor_index import NeighborIndex
+from .genre_index import GenreIndex
+from .title_index import TitleIndex
+from .artifacts import MODEL_ARTIFACT_DIR, has_arrays, load_arrays, matches_source
+from .catalog import Catalog, MovieRecord
+from .online_learner import OnlineLearner, start_retrain_scheduler
 
 # Load environment variables
 load_dotenv()
@@ -14,17 +26,29 @@ load_dotenv()
 recommend_bp = Blueprint("recommend", __name__, url_prefix="/recommend")
 
 # ── TMDB configuration from .env ─────────────────────────────────────────────────
-TMDB_API_KEY    = os.getenv("TMDB_API_KEY", "")
-TMDB_BASE_URL   = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
 TMDB_IMAGE_BASE = os.getenv("TMDB_IMAGE_BASE", "https://image.tmdb.org/t/p/w500")
 
 # Model file paths (from .env or defaults)
 EMOTION_MODEL_PATH       = os.getenv("EMOTION_MODEL_PATH",       "emotion_classifier.joblib")
 CONTENT_SIM_PATH         = os.getenv("CONTENT_SIM_PATH",         "content_similarity.joblib")
+CONTENT_NEIGHBORS_PATH   = os.getenv("CONTENT_NEIGHBORS_PATH",   "content_neighbors.npz")
+CONTENT_NEIGHBORS_K      = int(os.getenv("CONTENT_NEIGHBORS_K",  "50"))
 COLLABORATIVE_MODEL_PATH = os.getenv("COLLABORATIVE_MODEL_PATH", "collaborative_filtering.joblib")
 MOVIE_METADATA_CSV_PATH  = os.getenv("MOVIE_METADATA_CSV_PATH",  "movie_metadata.csv")
 
-# Emotion ↔ Genre mapping (used for labeling only)
+# Max seconds a page waits on TMDB enrichment before falling back to CSV-only cards
+ENRICH_BUDGET_SECONDS = float(os.getenv("ENRICH_BUDGET_SECONDS", "1.5"))
+
+# Per-user "Only For You" cache: full TTL for complete lists, short TTL when some
+# cards fell back because enrichment ran out of budget
+PERSONALIZED_CACHE_TTL         = int(os.getenv("PERSONALIZED_CACHE_TTL", "3600"))
+PERSONALIZED_CACHE_PARTIAL_TTL = int(os.getenv("PERSONALIZED_CACHE_PARTIAL_TTL", "60"))
+PERSONALIZED_COUNT             = 10
+
+# Seconds between checks for genres the metadata store gained since genre_index was built
+GENRE_INDEX_REFRESH_INTERVAL = int(os.getenv("GENRE_INDEX_REFRESH_INTERVAL", "600"))
+
+# Emotion ↔ Genre mapping (selects candidate movies through genre_index)
 EMOTION_GENRE_MAP = {
     "joy": ["Comedy", "Musical", "Family", "Animation"],
     "sadness": ["Drama", "Romance", "Music"],
@@ -38,79 +62,337 @@ EMOTION_GENRE_MAP = {
 
 # ── Globals (loaded once) ────────────────────────────────────────────────────────
 emotion_model  = None
-content_sim    = None
+content_index  = None
 svd_model      = None
-movies_df      = None
-title_to_index = None
-tmdb_session   = None
+svd_scorer     = None
+catalog        = None
+genre_index    = None
+title_index    = None
+online_learner = None
+
+# Readiness state, set once load_models()/warmup_models() complete
+models_ready   = False
+warmed_up      = False
+load_error     = None
+_models_lock   = threading.Lock()
+
+# Rows with stored genres when genre_index was built, and when that was last re-checked
+_genre_index_stored   = 0
+_genre_index_checked  = 0.0
+_genre_index_lock     = threading.Lock()
+
+# user id -> {"model", "recs", "ids", "cards"}. Entries are only valid for the model
+# version and the user's `recs_version` counter in Mongo they were built for, so a bump
+# from any worker invalidates every worker's copy, shared store or not.
+personalized_cache = TTLCache("personalized", PERSONALIZED_CACHE_TTL, maxsize=10_000,
+                              is_negative=lambda value: False)
 
 def load_models():
     """
-    Load or reuse all models and movie metadata. Uses memory-mapping for content_similarity.
+    Load or reuse all models and movie metadata. Content similarity comes from the
+    precomputed top-K neighbor index; if that file is missing it is built from the
+    memory-mapped dense matrix and saved for the next load.
+    Thread-safe: concurrent first callers wait for a single load.
     """
-    global emotion_model, content_sim, svd_model, movies_df, title_to_index, tmdb_session
+    global models_ready
+
+    if not models_ready:
+        with _models_lock:
+            if not models_ready:
+                _load_all()
+                models_ready = True
+    start_model_scheduler()
+
+def _load_all():
+    global emotion_model, content_index, svd_model, svd_scorer, catalog, genre_index, title_index, online_learner
 
     if emotion_model is None:
         emotion_model = joblib.load(EMOTION_MODEL_PATH)
 
-    if content_sim is None:
-        # memory-map the float32 similarity array
-        content_sim = joblib.load(CONTENT_SIM_PATH, mmap_mode="r")
+    if catalog is None:
+        catalog = load_catalog()
+
+    if svd_scorer is None or content_index is None:
+        load_shared_artifacts()
+
+    if content_index is None:
+        if os.path.exists(CONTENT_NEIGHBORS_PATH):
+            content_index = NeighborIndex.load(CONTENT_NEIGHBORS_PATH)
+        else:
+            print(f"{CONTENT_NEIGHBORS_PATH} not found, building it once from {CONTENT_SIM_PATH} "
+                  f"(run `python -m src.routes.neighbor_index` to precompute)")
+            content_sim = joblib.load(CONTENT_SIM_PATH, mmap_mode="r")
+            content_index = NeighborIndex.from_similarity(content_sim, k=CONTENT_NEIGHBORS_K)
+            del content_sim
+            # Saved so later boots (and the other workers) load it instead of rebuilding
+            try:
+                content_index.save(CONTENT_NEIGHBORS_PATH)
+            except OSError as e:
+                print(f"Could not save {CONTENT_NEIGHBORS_PATH}: {e}")
+
+    if svd_scorer is None:
+        if svd_model is None:
+            svd_model = joblib.load(COLLABORATIVE_MODEL_PATH)
+        # Factor matrices are aligned to catalog rows once, so scoring is one mat-vec
+        svd_scorer = SVDScorer.from_surprise(svd_model, catalog.ids.tolist())
+
+    if online_learner is None:
+        online_learner = OnlineLearner(svd_scorer, catalog, on_update=invalidate_recommendations)
+
+    if genre_index is None:
+        genre_index = build_genre_index(catalog)
+
+    if title_index is None:
+        title_index = build_title_index(catalog)
+
+def load_catalog() -> Catalog:
+    """
+    Load the movie catalog from the binary catalog/ arrays in MODEL_ARTIFACT_DIR when
+    present and exported from the current MOVIE_METADATA_CSV_PATH (no CSV parsing),
+    otherwise from the CSV.
+    """
+    catalog_dir = os.path.join(MODEL_ARTIFACT_DIR, "catalog")
+    if has_arrays(catalog_dir):
+        if matches_source(catalog_dir, MOVIE_METADATA_CSV_PATH):
+            return Catalog.from_arrays(load_arrays(catalog_dir))
+        print(f"{MOVIE_METADATA_CSV_PATH} changed since {MODEL_ARTIFACT_DIR} was exported; re-run "
+              f"`python -m src.routes.artifacts`. Falling back to the CSV and joblib models.")
+    return Catalog.from_csv(MOVIE_METADATA_CSV_PATH)
+
+def load_shared_artifacts():
+    """
+    Use the flat .npy artifacts in MODEL_ARTIFACT_DIR (see src/routes/artifacts.py) when
+    they exist, were exported from the current CSV and match the loaded catalog. They are
+    memory-mapped read-only, so every worker process on the box shares one copy of the
+    SVD factors and neighbor arrays.
+    """
+    global svd_scorer, content_index
+
+    catalog_dir = os.path.join(MODEL_ARTIFACT_DIR, "catalog")
+    if not has_arrays(catalog_dir) or not matches_source(catalog_dir, MOVIE_METADATA_CSV_PATH):
+        return  # load_catalog already warned about a stale export
+    if not np.array_equal(load_arrays(catalog_dir)["ids"], catalog.ids):
+        print(f"{MODEL_ARTIFACT_DIR} does not match the loaded catalog; re-run "
+              f"`python -m src.routes.artifacts`. Falling back to joblib models.")
+        return
+
+    svd_dir = os.path.join(MODEL_ARTIFACT_DIR, "svd")
+    if has_arrays(svd_dir):
+        svd_scorer = SVDScorer.from_arrays(load_arrays(svd_dir))
 
-    if svd_model is None:
+    neighbors_dir = os.path.join(MODEL_ARTIFACT_DIR, "neighbors")
+    if has_arrays(neighbors_dir):
+        content_index = NeighborIndex(**load_arrays(neighbors_dir))
+
+def start_model_scheduler():
+    """
+    Start this process's retrain/reload thread on first use.
+    """
+    start_retrain_scheduler(COLLABORATIVE_MODEL_PATH, MODEL_ARTIFACT_DIR, reload_collaborative_model)
+
+def reload_collaborative_model():
+    """
+    Swap in a retrained collaborative model without touching the other models.
+    Online user vectors solved against the old item factors are re-solved lazily.
+    """
+    global svd_model, svd_scorer, online_learner
+
+    scorer = None
+    svd_dir = os.path.join(MODEL_ARTIFACT_DIR, "svd")
+    catalog_dir = os.path.join(MODEL_ARTIFACT_DIR, "catalog")
+    if has_arrays(svd_dir) and has_arrays(catalog_dir) \
+            and matches_source(catalog_dir, MOVIE_METADATA_CSV_PATH) \
+            and np.array_equal(load_arrays(catalog_dir)["ids"], catalog.ids):
+        scorer = SVDScorer.from_arrays(load_arrays(svd_dir))
+    else:
         svd_model = joblib.load(COLLABORATIVE_MODEL_PATH)
+        scorer = SVDScorer.from_surprise(svd_model, catalog.ids.tolist())
+
+    # Rebinding the globals is atomic; in-flight requests finish on the old objects.
+    # Cached lists carry the model version, so every worker's entries go stale at once.
+    online_learner = OnlineLearner(scorer, catalog, on_update=invalidate_recommendations)
+    svd_scorer = scorer
+    personalized_cache.clear()
+    print("Collaborative model reloaded")
+
+def record_user_feedback(db, user_id, item_type: str = "movie"):
+    """
+    Called after a user likes/dislikes/reviews an item: drop their cached recommendations
+    and, for movies, re-solve their latent vector in the background (which drops the
+    cache again once the new vector is visible).
+    """
+    invalidate_recommendations(db, user_id)
+    if item_type == "movie" and online_learner is not None:
+        online_learner.schedule_update(db, str(user_id))
+
+def invalidate_recommendations(db, user_id):
+    """
+    Forget the user's cached "Only For You" list (after any write that affects it):
+    bump their recs_version so every worker's entry goes stale, and drop this worker's.
+    """
+    try:
+        db.users.update_one({"_id": ObjectId(user_id)}, {"$inc": {"recs_version": 1}})
+    except Exception as e:
+        print(f"Error bumping recs_version for {user_id}: {e}")
+    try:
+        personalized_cache.delete(str(user_id))
+    except Exception as e:
+        print(f"Cache delete error (personalized): {e}")
+
+def recs_version(db, user_id) -> int:
+    """
+    The user's recommendation invalidation counter (0 if never bumped).
+    """
+    try:
+        user = db.users.find_one({"_id": ObjectId(user_id)}, {"recs_version": 1})
+    except Exception as e:
+        print(f"Error reading recs_version for {user_id}: {e}")
+        return -1  # unknown: never matches a cached entry
+    return (user or {}).get("recs_version", 0)
+
+def warmup_models(prefetch_popular: bool = False):
+    """
+    Preload every artifact and push a dummy request through each model so the first
+    real request doesn't pay for unpickling, CSV parsing or lazy index builds.
+    Optionally prefetch TMDB /movie/popular details into the cache and metadata store.
+    """
+    global warmed_up, load_error
+    started = time.time()
+    try:
+        load_models()
+        emotion_model.predict([clean_text("warming up")])
+        svd_scorer.top_n(None, 1)
+        if len(content_index):
+            content_index.lookup(0, 1)
+        title_index.search("a", limit=1)
+        genre_index.pick(next(iter(EMOTION_GENRE_MAP)), 1)
+        if prefetch_popular:
+            prefetch_popular_movies()
+    except Exception as e:
+        load_error = str(e)
+        print(f"Model warmup failed: {e}")
+        raise
+    warmed_up = True
+    print(f"Recommendation models ready in {time.time() - started:.1f}s")
+
+def prefetch_popular_movies(pages: int = 1):
+    """
+    Warm the TMDB cache and metadata store with the current popular movies.
+    """
+    popular = tmdb.get_many([("/movie/popular", {"page": page}) for page in range(1, pages + 1)])
+    ids = [m["id"] for data in popular if data for m in data.get("results", []) if m.get("id")]
+    wait([tmdb.executor.submit(get_movie_details_from_tmdb, int(i)) for i in ids])
+
+def readiness() -> dict:
+    """
+    Snapshot of model loading state for the readiness endpoint.
+    """
+    return {
+        "ready": models_ready,
+        "warmed_up": warmed_up,
+        "error": load_error,
+    }
 
-    if movies_df is None:
-        movies_df = pd.read_csv(MOVIE_METADATA_CSV_PATH)
-        movies_df["title_lower"] = movies_df["title"].str.lower()
-        title_to_index = pd.Series(movies_df.index.values, index=movies_df["title_lower"]).to_dict()
+def build_genre_index(cat: Catalog) -> GenreIndex:
+    """
+    Build the genre → rows index for the catalog. Genres come from the catalog's 'genres'
+    column, and from the local metadata store for rows that have none there. Rows are
+    ranked by cat.rank.
+    """
+    global _genre_index_stored
+    try:
+        stored = get_metadata_store().all_genres()
+    except Exception as e:
+        print(f"Metadata store read error: {e}")
+        stored = {}
+    row_genres = [
+        (cat.genres[row] if cat.genres is not None else None) or stored.get(int(movie_id), [])
+        for row, movie_id in enumerate(cat.ids)
+    ]
 
-    if tmdb_session is None:
-        tmdb_session = requests.Session()
+    index = GenreIndex.from_row_genres(row_genres, cat.rank)
+    index.precompute_emotions(EMOTION_GENRE_MAP)
+    _genre_index_stored = len(stored)
+    return index
+
+def refresh_genre_index():
+    """
+    At most every GENRE_INDEX_REFRESH_INTERVAL seconds, rebuild genre_index in the
+    background if the metadata store has gained genres (TMDB write-through and the
+    refresher fill them in after startup).
+    """
+    global _genre_index_checked
+    if GENRE_INDEX_REFRESH_INTERVAL <= 0 or time.time() - _genre_index_checked < GENRE_INDEX_REFRESH_INTERVAL:
+        return
+    if not _genre_index_lock.acquire(blocking=False):
+        return  # another thread is checking
+    _genre_index_checked = time.time()
 
-    return
+    def run():
+        global genre_index
+        try:
+            if get_metadata_store().genre_count() > _genre_index_stored:
+                genre_index = build_genre_index(catalog)
+        except Exception as e:
+            print(f"Genre index refresh error: {e}")
+        finally:
+            _genre_index_lock.release()
+
+    threading.Thread(target=run, name="genre-index-refresh", daemon=True).start()
+
+def build_title_index(cat: Catalog) -> TitleIndex:
+    """
+    Build the popularity-ranked title index used by search_suggestions.
+    """
+    index = TitleIndex()
+    index.add_many(
+        (row, title, float(rank), {"id": int(movie_id), "title": title})
+        for row, (movie_id, title, rank) in enumerate(zip(cat.ids, cat.titles, cat.rank))
+    )
+    return index
 
-@lru_cache(maxsize=1024)
+@tmdb_cached("movie_details")
 def get_movie_details_from_tmdb(tmdb_id: int) -> dict:
     """
-    Fetch full details from TMDB for a given movie ID.
-    Caches up to 1024 unique IDs to avoid repeated HTTP calls.
+    Fetch full details from TMDB for a given movie ID and write them through to the
+    local metadata store. Results are cached with a TTL (failures only briefly).
     """
     try:
-        resp = tmdb_session.get(
-            f"{TMDB_BASE_URL}/movie/{tmdb_id}",
-            params={"api_key": TMDB_API_KEY}
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        poster = data.get("poster_path") or ""
-        if poster and not poster.startswith("/"):
-            poster = "/" + poster
-        return {
-            "id": data.get("id"),
-            "title": data.get("title", ""),
-            "poster_path": TMDB_IMAGE_BASE + poster if poster else "",
-            "vote_average": data.get("vote_average", 0.0),
-            "release_date": data.get("release_date", "") or "",
-            "genres": [g["name"] for g in data.get("genres", [])],
-            "overview": data.get("overview", "") or ""
-        }
+        card = fetch_card(tmdb_id)
     except Exception:
         return None
+    try:
+        get_metadata_store().upsert(card)
+    except Exception as e:
+        print(f"Metadata store write error: {e}")
+    return format_movie_card(card)
+
+def format_movie_card(card: dict) -> dict:
+    """
+    Template-ready card from stored/fetched fields (absolute poster URL).
+    """
+    poster = card.get("poster_path") or ""
+    return {**card, "poster_path": TMDB_IMAGE_BASE + poster if poster else ""}
 
-def enhance_movie_data(movie: dict) -> dict:
+def stored_movie_cards(tmdb_ids) -> dict:
     """
-    Merge stored metadata with TMDB-fetched details if possible.
-    If TMDB fails, fallback to minimal stored info (title + ID).
+    Template-ready cards for the ids the local metadata store can fully render
+    (i.e. rows with a poster). Missing/incomplete ids are left out.
+    """
+    try:
+        stored = get_metadata_store().get_many(tmdb_ids)
+    except Exception as e:
+        print(f"Metadata store read error: {e}")
+        return {}
+    return {i: format_movie_card(c) for i, c in stored.items() if c.get("poster_path")}
+
+def fallback_movie_data(movie: MovieRecord) -> dict:
+    """
+    Minimal card built from stored metadata only (title + ID).
     """
-    tmdb_id = movie.get("id")
-    if tmdb_id:
-        tmdb_info = get_movie_details_from_tmdb(tmdb_id)
-        if tmdb_info:
-            return tmdb_info
     return {
-        "id": movie.get("id"),
-        "title": movie.get("title", ""),
+        "id": movie.id,
+        "title": movie.title,
         "poster_path": "",
         "vote_average": 0.0,
         "release_date": "",
@@ -118,63 +400,102 @@ def enhance_movie_data(movie: dict) -> dict:
         "overview": ""
     }
 
+def enhance_movie_lists(*movie_lists, budget: float = ENRICH_BUDGET_SECONDS) -> list:
+    """
+    Enrich several lists of stored movies in one batch. Ids are deduped across lists and
+    read from the local metadata store first; cache hits are used directly and the
+    remaining misses are fetched concurrently on the TMDB pool.
+    Anything still in flight after `budget` seconds gets the fallback card; those
+    fetches keep running and warm the cache/store for the next page view.
+    Returns one enriched list per input list, in the same order.
+    """
+    ids = {m.id for movies in movie_lists for m in movies if m.id}
+    details = stored_movie_cards(ids)
+    pending = {}
+    for tmdb_id in ids:
+        if tmdb_id not in details:
+            cached = get_movie_details_from_tmdb.peek(tmdb_id)
+            if cached is not MISS:
+                details[tmdb_id] = cached
+            else:
+                pending[tmdb_id] = tmdb.executor.submit(get_movie_details_from_tmdb, tmdb_id)
+
+    if pending:
+        left = time_left()
+        wait(pending.values(), timeout=budget if left is None else max(0, min(budget, left)))
+        for tmdb_id, future in pending.items():
+            if future.done():
+                details[tmdb_id] = future.result()
+
+    enriched = []
+    for movies in movie_lists:
+        cards = []
+        for movie in movies:
+            info = details.get(movie.id)
+            cards.append(info or fallback_movie_data(movie))
+        enriched.append(cards)
+    return enriched
+
 def get_content_recommendations(movie_title: str, n: int = 5) -> list:
     """
-    Look up movie_title → index. Use memory-mapped content_sim to pick top-n similar.
+    Look up movie_title → index. Slice the top-n precomputed neighbors from content_index.
     If title not found, return random sample of n.
     """
     load_models()
-    idx = title_to_index.get(movie_title.lower())
+    idx = catalog.row_by_title.get(movie_title.lower())
     if idx is None:
-        return movies_df.sample(n).to_dict("records")
+        return catalog.sample(n)
 
-    sim_scores = content_sim[idx]  # memory-mapped float32 array
-    top_indices = (-sim_scores).argsort()[1 : n+1]
-    return movies_df.iloc[top_indices].to_dict("records")
+    top_indices = content_index.lookup(idx, n)
+    return catalog.records(top_indices)
 
 def get_emotion_recommendations(user_input: str, n: int = 5) -> tuple[str, list]:
     """
-    Predict emotion from user_input. Then sample n random movies (genre filtering unsupported without 'genres' column).
-    Returns (detected_emotion, [movie_dicts]).
+    Predict emotion from user_input. Then pick n popular movies from the genres mapped to
+    that emotion via genre_index (random sample if the emotion has no genre candidates).
+    Returns (detected_emotion, [MovieRecord]).
     """
     load_models()
+    refresh_genre_index()
     cleaned = clean_text(user_input)
     detected_emotion = emotion_model.predict([cleaned])[0]
-    recommendations = movies_df.sample(n).to_dict("records")
-    return detected_emotion, recommendations
+    rows = genre_index.pick(detected_emotion, n)
+    if len(rows) == 0:
+        return detected_emotion, catalog.sample(n)
+    return detected_emotion, catalog.records(rows)
 
 def get_top_collaborative_recommendations(user_id, n: int = 5) -> list:
     """
-    Predict ratings for all movies in movies_df using the memory-loaded SVD, return top-n.
+    Score all movies in the catalog for the user with the batch SVD scorer, return top-n.
+    Uses the user's online-learned vector when there is one, else their trained factors
+    (retrained models key app users by their id string), else the popularity baseline.
     """
     load_models()
-    try:
-        uid = int(user_id)
-    except:
-        uid = abs(hash(user_id)) % 100_000
+    user_id = str(user_id)
+    learner = online_learner
+    scorer = learner.scorer  # the factors the learner's vectors were solved against
 
-    preds = []
-    for idx, row in movies_df.iterrows():
-        mid = row["id"]
-        est = svd_model.predict(uid, mid).est
-        preds.append((idx, est))
+    vector = None
+    try:
+        vector = learner.user_vector(current_app.config["db"], user_id)
+    except Exception as e:
+        print(f"User factors read error: {e}")
 
-    top_indices = sorted(preds, key=lambda x: x[1], reverse=True)[:n]
-    indices = [i for i, _ in top_indices]
-    return movies_df.iloc[indices].to_dict("records")
+    if vector is not None:
+        top_indices = scorer.top_rows(scorer.score_vector(*vector), n)
+    else:
+        top_indices = scorer.top_n(user_id, n)
+    return catalog.records(top_indices)
 
 @recommend_bp.route("/search_suggestions", methods=["GET"])
 def search_suggestions():
     """
-    Return up to 10 title suggestions matching query substring (case-insensitive).
+    Return up to 10 title suggestions from the in-memory title index: prefix matches
+    first, then substring matches, by popularity (case- and accent-insensitive).
     """
     load_models()
-    query = request.args.get("q", "").strip().lower()
-    suggestions = []
-    if query:
-        mask = movies_df["title_lower"].str.contains(query, na=False)
-        filtered = movies_df.loc[mask, ["id", "title"]].head(10)
-        suggestions = filtered.to_dict("records")
+    query = request.args.get("q", "").strip()
+    suggestions = title_index.search(query, limit=10) if query else []
     return jsonify(suggestions)
 
 @recommend_bp.route("/", methods=["GET"])
@@ -187,29 +508,44 @@ def recommendations():
     """
     load_models()
 
-    # 1) Personalized "Only For You" from collaborative filtering
-    personalized_raw = get_top_collaborative_recommendations(current_user.id, n=10)
-    personalized_recs = [enhance_movie_data(m) for m in personalized_raw]
-    # Filter out any with missing poster_path
-    personalized_recs = [m for m in personalized_recs if m.get("poster_path")]
+    # 1) Personalized "Only For You" from collaborative filtering, cached per user
+    user_id = str(current_user.id)
+    version = online_learner.version
+    recs = recs_version(current_app.config["db"], user_id)
+    cached = personalized_cache.get(user_id)
+    if cached is not MISS and (cached.get("model") != version or cached.get("recs") != recs):
+        cached = MISS
+    personalized_raw = []
+    if cached is MISS:
+        personalized_raw = get_top_collaborative_recommendations(user_id, n=PERSONALIZED_COUNT)
 
     # 2) Determine if mood-based or query-based
-    main_recs = []
+    main_raw = []
     rec_type = "Only For You"
     detected_emotion = None
     search_query = request.args.get("query", "").strip()
     user_input = request.args.get("user_input", "").strip()
 
     if user_input:
-        detected_emotion, emo_movies = get_emotion_recommendations(user_input, n=10)
-        emo_recs = [enhance_movie_data(m) for m in emo_movies]
-        main_recs = [m for m in emo_recs if m.get("poster_path")]
+        detected_emotion, main_raw = get_emotion_recommendations(user_input, n=10)
         rec_type = f"{detected_emotion.capitalize()} Recommendations"
     elif search_query:
-        content_movies = get_content_recommendations(search_query, n=10)
-        content_recs = [enhance_movie_data(m) for m in content_movies]
-        main_recs = [m for m in content_recs if m.get("poster_path")]
+        main_raw = get_content_recommendations(search_query, n=10)
 
+    # 3) Enrich both lists in one concurrent batch, bounded by ENRICH_BUDGET_SECONDS
+    personalized_recs, main_recs = enhance_movie_lists(personalized_raw, main_raw)
+    if cached is MISS:
+        complete = all(m.get("poster_path") for m in personalized_recs)
+        personalized_cache.set(
+            user_id,
+            {"model": version, "recs": recs, "ids": [m.id for m in personalized_raw], "cards": personalized_recs},
+            ttl=PERSONALIZED_CACHE_TTL if complete else PERSONALIZED_CACHE_PARTIAL_TTL
+        )
+    else:
+        personalized_recs = cached["cards"]
+    # Filter out any with missing poster_path
+    personalized_recs = [m for m in personalized_recs if m.get("poster_path")]
+    main_recs = [m for m in main_recs if m.get("poster_path")]
 
     return render_template(
         "home/recommendations.html",
@@ -218,8 +554,5 @@ def recommendations():
         rec_type=rec_type,
         emotion=detected_emotion,
         search_query=search_query,
-        user_input=user_input,
-        TMDB_API_KEY=TMDB_API_KEY,  # Pass TMDB_API_KEY to the template
-        TMDB_BASE_URL=TMDB_BASE_URL,  # Pass TMDB_BASE_URL to the template
-        TMDB_IMAGE_BASE=TMDB_IMAGE_BASE  # Pass TMDB_IMAGE_BASE to the template
+        user_input=user_input
     )
@@ -0,0 +1,186 @@
+# src/routes/svd_scorer.py
+import numpy as np
+
+
+class SortedIdMap:
+    """
+    Read-only raw id -> inner id mapping over two parallel arrays sorted by raw id.
+    Unlike a dict it can live in a shared memory-mapped file.
+    """
+
+    def __init__(self, raw_ids, inner_ids):
+        self.raw_ids = raw_ids
+        self.inner_ids = inner_ids
+
+    @classmethod
+    def from_dict(cls, mapping):
+        raw_ids = np.asarray(list(mapping.keys()))
+        inner_ids = np.asarray(list(mapping.values()), dtype=np.int64)
+        order = np.argsort(raw_ids, kind="stable")
+        return cls(raw_ids[order], inner_ids[order])
+
+    def get(self, raw_id, default=None):
+        if raw_id is None or len(self.raw_ids) == 0:
+            return default
+        try:
+            pos = np.searchsorted(self.raw_ids, raw_id)
+        except (TypeError, ValueError):  # raw_id not comparable with the stored ids
+            return default
+        if pos < len(self.raw_ids) and self.raw_ids[pos] == raw_id:
+            return int(self.inner_ids[pos])
+        return default
+
+
+class SVDScorer:
+    """
+    Batch scorer over the factors of a trained Surprise SVD model.
+
+    The factor matrices are pulled out of the model once and re-ordered to
+    match the movie catalog, so scoring every title for a user is a single
+    matrix-vector product instead of one `svd_model.predict` call per row.
+    Scores match `svd_model.predict(uid, movie_id).est` for every row.
+    """
+
+    def __init__(self, global_mean, rating_scale, biased, user_index,
+                 user_bias, user_factors, item_bias, item_factors, item_known):
+        self.global_mean = float(global_mean)
+        self.rating_scale = rating_scale
+        self.biased = biased
+        self.user_index = user_index      # raw uid -> row in user_bias/user_factors (dict or SortedIdMap)
+        self.user_bias = user_bias
+        self.user_factors = user_factors
+        self.item_bias = item_bias        # one entry per catalog row (0 if unknown)
+        self.item_factors = item_factors  # one row per catalog row (zeros if unknown)
+        self.item_known = item_known
+
+    @classmethod
+    def from_surprise(cls, model, movie_ids):
+        """
+        Build a scorer from a fitted `surprise.SVD` and the catalog's movie ids
+        (in catalog row order).
+        """
+        trainset = model.trainset
+        n_factors = model.qi.shape[1]
+        n_rows = len(movie_ids)
+
+        item_bias = np.zeros(n_rows, dtype=np.float64)
+        item_factors = np.zeros((n_rows, n_factors), dtype=np.float64)
+        item_known = np.zeros(n_rows, dtype=bool)
+
+        for row, raw_iid in enumerate(movie_ids):
+            try:
+                inner = trainset.to_inner_iid(raw_iid)
+            except ValueError:
+                continue
+            item_known[row] = True
+            item_factors[row] = model.qi[inner]
+            if model.biased:
+                item_bias[row] = model.bi[inner]
+
+        user_index = dict(trainset._raw2inner_id_users)
+        user_bias = np.asarray(model.bu, dtype=np.float64) if model.biased else np.zeros(len(user_index))
+
+        return cls(
+            global_mean=trainset.global_mean,
+            rating_scale=trainset.rating_scale,
+            biased=model.biased,
+            user_index=user_index,
+            user_bias=user_bias,
+            user_factors=np.asarray(model.pu, dtype=np.float64),
+            item_bias=item_bias,
+            item_factors=item_factors,
+            item_known=item_known,
+        )
+
+    def to_arrays(self):
+        """
+        Flat arrays for artifacts.save_arrays; the inverse of from_arrays.
+        """
+        index = self.user_index
+        if not isinstance(index, SortedIdMap):
+            index = SortedIdMap.from_dict(index)
+        return {
+            "meta": np.array([self.global_mean, self.rating_scale[0], self.rating_scale[1], float(self.biased)]),
+            "user_raw_ids": index.raw_ids,
+            "user_inner_ids": index.inner_ids,
+            "user_bias": self.user_bias,
+            "user_factors": self.user_factors,
+            "item_bias": self.item_bias,
+            "item_factors": self.item_factors,
+            "item_known": self.item_known,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Rebuild a scorer from (possibly memory-mapped) arrays written by to_arrays.
+        """
+        global_mean, lower, upper, biased = arrays["meta"]
+        return cls(
+            global_mean=global_mean,
+            rating_scale=(float(lower), float(upper)),
+            biased=bool(biased),
+            user_index=SortedIdMap(arrays["user_raw_ids"], arrays["user_inner_ids"]),
+            user_bias=arrays["user_bias"],
+            user_factors=arrays["user_factors"],
+            item_bias=arrays["item_bias"],
+            item_factors=arrays["item_factors"],
+            item_known=arrays["item_known"],
+        )
+
+    def score_all(self, uid):
+        """
+        Estimated rating of every catalog row for `uid`, as a float64 array.
+        Unknown users are ranked by global mean + item bias.
+        """
+        inner = self.user_index.get(uid)
+        if inner is not None:
+            return self.score_vector(self.user_bias[inner], self.user_factors[inner])
+
+        if self.biased:
+            scores = self.global_mean + self.item_bias
+        else:
+            # Unbiased SVD cannot predict unknown pairs; Surprise falls back to the global mean
+            scores = np.full(len(self.item_bias), self.global_mean)
+        lower, upper = self.rating_scale
+        return np.clip(scores, lower, upper)
+
+    def score_vector(self, bias, factors):
+        """
+        Estimated rating of every catalog row for a user given by (bias, factors),
+        e.g. a trained user or one folded in online.
+        """
+        dots = self.item_factors @ factors
+        if self.biased:
+            # Unknown items have zero factors, so their dot product is 0 as in Surprise
+            scores = self.global_mean + self.item_bias + bias + dots
+        else:
+            scores = np.where(self.item_known, dots, self.global_mean)
+        lower, upper = self.rating_scale
+        return np.clip(scores, lower, upper)
+
+    def top_n(self, uid, n=5):
+        """
+        Return the catalog row indices of the n highest-scoring movies for `uid`,
+        best first. Ties keep catalog order, like a stable sort would.
+        """
+        return self.top_rows(self.score_all(uid), n)
+
+    @staticmethod
+    def top_rows(scores, n):
+        """
+        Row indices of the n highest scores, best first, ties in row order.
+        """
+        n = min(n, len(scores))
+        if n <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        if n < len(scores):
+            # Include every row tied with the n-th best so tie-breaking stays stable
+            kth = scores[np.argpartition(scores, -n)[-n]]
+            candidates = np.flatnonzero(scores >= kth)
+        else:
+            candidates = np.arange(len(scores))
+
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order][:n]
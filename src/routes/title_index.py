@@ -0,0 +1,212 @@
+# src/routes/title_index.py
+import bisect
+import heapq
+import threading
+import unicodedata
+
+# Prefixes up to this length get rank-ordered postings, so short (and so very common)
+# prefixes never scan their whole sorted range; longer ones rank the exact range
+SHORT_PREFIX_LEN = 2
+
+
+def fold(text):
+    """
+    Case- and diacritic-insensitive form of a title: "Amélie " -> "amelie".
+    """
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def posting_keys(folded):
+    """
+    Keys of every posting list an entry belongs to: its trigrams, plus ("t", p) for
+    each short prefix of the title and ("w", p) for each short prefix of its words.
+    """
+    keys = trigrams(folded)
+    keys.update(("t", folded[:n]) for n in range(1, SHORT_PREFIX_LEN + 1))
+    for word in folded.split():
+        keys.update(("w", word[:n]) for n in range(1, SHORT_PREFIX_LEN + 1))
+    return keys
+
+
+class TitleIndex:
+    """
+    In-memory title search index: a sorted array of folded titles (and of their
+    words) for prefix lookups, plus an inverted index from trigrams and short
+    prefixes whose postings are kept in popularity order, for substring lookups and
+    for prefixes too common to rank by scanning.
+
+    search() returns payloads ranked as: title prefix matches, then word prefix
+    matches, then other substring matches, each by popularity, at most `limit`.
+    Entries can be added or removed at any time; `key` dedupes (a re-add updates the
+    payload and rank).
+    """
+
+    def __init__(self):
+        self.payloads = []
+        self.folded = []
+        self.rank = []
+        self.keys = {}
+        self._titles = []   # sorted (folded title, entry id)
+        self._words = []    # sorted (folded word, entry id)
+        self._postings = {}  # posting_keys() key -> [entry id], best-ranked first
+        self._free = []     # entry ids of removed entries, reused by later adds
+        self._lock = threading.Lock()
+
+    def _rank_key(self, eid):
+        return -self.rank[eid]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, title, rank=0.0, payload=None):
+        with self._lock:
+            self._add(key, title, rank, payload, bulk=None)
+
+    def add_many(self, items):
+        """
+        Bulk add of (key, title, rank, payload) tuples; sorts once at the end.
+        """
+        with self._lock:
+            touched = set()
+            for key, title, rank, payload in items:
+                self._add(key, title, rank, payload, bulk=touched)
+            self._titles.sort()
+            self._words.sort()
+            for pkey in touched:
+                self._postings[pkey].sort(key=self._rank_key)
+
+    def remove(self, key):
+        """
+        Drop the entry for `key` (no-op if absent).
+        """
+        with self._lock:
+            eid = self.keys.pop(key, None)
+            if eid is None:
+                return
+            folded = self.folded[eid]
+            self._discard(self._titles, (folded, eid))
+            for word in set(folded.split()):
+                self._discard(self._words, (word, eid))
+            for pkey in posting_keys(folded):
+                postings = self._postings[pkey]
+                self._unlink(postings, eid)
+                if not postings:
+                    del self._postings[pkey]
+            self.payloads[eid] = None
+            self.folded[eid] = ""
+            self._free.append(eid)
+
+    def _add(self, key, title, rank, payload, bulk):
+        # bulk: None to keep every list sorted now, else a set collecting the
+        # posting keys whose lists the caller sorts once at the end
+        folded = fold(title)
+        if not folded:
+            return
+
+        eid = self.keys.get(key)
+        if eid is not None:
+            # Known entry: refresh payload and rank; the title is assumed unchanged
+            self.payloads[eid] = payload
+            if rank != self.rank[eid]:
+                pkeys = posting_keys(self.folded[eid])
+                if bulk is not None:
+                    self.rank[eid] = rank
+                    bulk.update(pkeys)
+                else:
+                    # Move the entry within each rank-ordered posting list
+                    for pkey in pkeys:
+                        self._unlink(self._postings[pkey], eid)
+                    self.rank[eid] = rank
+                    for pkey in pkeys:
+                        bisect.insort(self._postings[pkey], eid, key=self._rank_key)
+            return
+
+        if self._free:
+            eid = self._free.pop()
+            self.payloads[eid], self.folded[eid], self.rank[eid] = payload, folded, rank
+        else:
+            eid = len(self.payloads)
+            self.payloads.append(payload)
+            self.folded.append(folded)
+            self.rank.append(rank)
+        self.keys[key] = eid
+
+        add = list.append if bulk is not None else bisect.insort
+        add(self._titles, (folded, eid))
+        for word in set(folded.split()):
+            add(self._words, (word, eid))
+        for pkey in posting_keys(folded):
+            postings = self._postings.setdefault(pkey, [])
+            if bulk is not None:
+                postings.append(eid)
+                bulk.add(pkey)
+            else:
+                bisect.insort(postings, eid, key=self._rank_key)
+
+    @staticmethod
+    def _discard(sorted_pairs, pair):
+        i = bisect.bisect_left(sorted_pairs, pair)
+        if i < len(sorted_pairs) and sorted_pairs[i] == pair:
+            del sorted_pairs[i]
+
+    def _unlink(self, postings, eid):
+        # Entries with equal rank sit together; find this one among them
+        i = bisect.bisect_left(postings, self._rank_key(eid), key=self._rank_key)
+        while i < len(postings) and postings[i] != eid:
+            i += 1
+        if i < len(postings):
+            del postings[i]
+
+    def search(self, query, limit=10):
+        q = fold(query)
+        if not q or limit <= 0:
+            return []
+
+        with self._lock:
+            results = []
+            seen = set()
+
+            def take(eids):
+                for eid in eids:
+                    if len(results) >= limit:
+                        return
+                    if eid not in seen:
+                        seen.add(eid)
+                        results.append(eid)
+
+            take(self._ranked_prefix(self._titles, "t", q, limit))
+            take(self._ranked_prefix(self._words, "w", q, limit))
+            if len(results) < limit and len(q) >= 3:
+                take(self._substring(q, limit + len(seen)))
+
+            return [self.payloads[eid] for eid in results]
+
+    def _ranked_prefix(self, sorted_pairs, kind, q, limit):
+        if len(q) <= SHORT_PREFIX_LEN:
+            return self._postings.get((kind, q), [])[:limit]
+        # Rank the whole matching range: cutting it first would drop popular titles
+        # that sort late within the prefix
+        start = bisect.bisect_left(sorted_pairs, (q, -1))
+        end = bisect.bisect_left(sorted_pairs, (q + "\U0010ffff", -1), lo=start)
+        matches = [eid for _, eid in sorted_pairs[start:end]]
+        return heapq.nlargest(limit, matches, key=self.rank.__getitem__)
+
+    def _substring(self, q, limit):
+        postings = [self._postings.get(g) for g in trigrams(q)]
+        if not postings or any(p is None for p in postings):
+            return []
+        # Walk the shortest rank-ordered posting list and verify each candidate
+        shortest = min(postings, key=len)
+        found = []
+        for eid in shortest:
+            if q in self.folded[eid]:
+                found.append(eid)
+                if len(found) >= limit:
+                    break
+        return found
@@ -0,0 +1,337 @@
+# src/routes/tmdb_client.py
+import os
+import time
+import random
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ── TMDB client configuration from .env ──────────────────────────────────────────
+TMDB_API_KEY         = os.getenv("TMDB_API_KEY", "")
+TMDB_BASE_URL        = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+TMDB_POOL_SIZE       = int(os.getenv("TMDB_POOL_SIZE", "32"))
+TMDB_CONNECT_TIMEOUT = float(os.getenv("TMDB_CONNECT_TIMEOUT", "3.05"))
+TMDB_READ_TIMEOUT    = float(os.getenv("TMDB_READ_TIMEOUT", "5"))
+TMDB_MAX_RETRIES     = int(os.getenv("TMDB_MAX_RETRIES", "2"))
+TMDB_BACKOFF         = float(os.getenv("TMDB_BACKOFF", "0.3"))
+TMDB_MAX_WORKERS     = int(os.getenv("TMDB_MAX_WORKERS", "16"))
+TMDB_BREAKER_FAILURES = int(os.getenv("TMDB_BREAKER_FAILURES", "5"))     # consecutive failures to open
+TMDB_BREAKER_RESET    = float(os.getenv("TMDB_BREAKER_RESET", "30"))    # seconds open before a probe
+TMDB_REQUEST_DEADLINE = float(os.getenv("TMDB_REQUEST_DEADLINE", "6"))  # TMDB budget per page view; 0 disables
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER = 5.0  # never sleep longer than this on a Retry-After header
+
+# Absolute time.monotonic() by which the current request must stop waiting on TMDB
+_deadline = contextvars.ContextVar("tmdb_deadline", default=None)
+
+
+class CircuitOpenError(requests.RequestException):
+    """
+    TMDB calls are failing fast because the circuit breaker is open.
+    """
+
+
+class DeadlineExceeded(requests.Timeout):
+    """
+    The current request's TMDB time budget is used up.
+    """
+
+
+def set_deadline(seconds):
+    """
+    Bound every TMDB call made in this context (and work it hands to the shared
+    pool via `submit`/`spawn`) to `seconds` from now. Returns a token for reset_deadline.
+    """
+    return _deadline.set(time.monotonic() + seconds)
+
+
+def reset_deadline(token):
+    _deadline.reset(token)
+
+
+@contextmanager
+def deadline(seconds):
+    token = set_deadline(seconds)
+    try:
+        yield
+    finally:
+        reset_deadline(token)
+
+
+def time_left():
+    """
+    Seconds until the current deadline, or None if there is none.
+    """
+    end = _deadline.get()
+    return None if end is None else end - time.monotonic()
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. After `failure_threshold` failures in a row it
+    opens and calls fail fast for `reset_timeout` seconds; then a single probe call is
+    let through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=TMDB_BREAKER_FAILURES, reset_timeout=TMDB_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._probing:
+                    print(f"TMDB circuit opened after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """
+        End a call that said nothing about upstream health (e.g. the caller ran out of
+        time): the counts stay as they are, but a half-open probe slot is freed.
+        """
+        with self._lock:
+            self._probing = False
+
+
+class TMDBClient:
+    """
+    Single TMDB client shared by all blueprints.
+
+    - one pooled keep-alive session with connect/read timeouts
+    - identical in-flight requests are coalesced into one upstream call
+    - 429/5xx and connection errors are retried with exponential backoff + jitter
+    - a shared worker pool for fan-out (`get_many`, `submit`, `spawn`)
+    - a circuit breaker that fails fast (CircuitOpenError) while TMDB is down
+    - the per-request deadline (`set_deadline`) caps timeouts, retries and waits
+
+    `get` returns the parsed JSON or raises requests.RequestException.
+    """
+
+    def __init__(self, api_key=TMDB_API_KEY, base_url=TMDB_BASE_URL, pool_size=TMDB_POOL_SIZE,
+                 timeout=(TMDB_CONNECT_TIMEOUT, TMDB_READ_TIMEOUT), max_retries=TMDB_MAX_RETRIES,
+                 backoff=TMDB_BACKOFF, max_workers=TMDB_MAX_WORKERS):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.max_workers = max_workers
+        self._setup()
+        # A forked worker inherits the pool's sockets but none of its threads
+        os.register_at_fork(after_in_child=self._setup)
+
+    def _setup(self):
+        """
+        Create the session, worker pool and in-flight table for this process.
+        """
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept": "application/json"})
+
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tmdb")
+        self.breaker = CircuitBreaker()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, path, params=None):
+        """
+        GET {base_url}{path} with the API key added. Concurrent calls with the same
+        path and params share a single upstream request.
+        """
+        params = dict(params or {})
+        key = (path, tuple(sorted(params.items())))
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            try:
+                return future.result(timeout=self._remaining())
+            except FutureTimeout:
+                raise DeadlineExceeded(f"deadline exceeded waiting for {path}")
+
+        try:
+            future.set_result(self._request(path, params))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return future.result()
+
+    def submit(self, path, params=None):
+        """
+        Run `get` on the shared pool and return its Future.
+        """
+        return self.spawn(self.get, path, params)
+
+    def spawn(self, fn, *args, **kwargs):
+        """
+        Run fn on the shared pool under the caller's deadline, so it also bounds the
+        TMDB calls fn makes. Plain `executor.submit` work has no deadline.
+        """
+        end = _deadline.get()
+
+        def run():
+            token = _deadline.set(end)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _deadline.reset(token)
+
+        return self.executor.submit(run)
+
+    def get_many(self, calls):
+        """
+        Fetch several (path, params) pairs concurrently on the shared pool.
+        Returns results in the same order; failed calls yield None.
+        """
+        futures = [self.submit(path, params) for path, params in calls]
+        results = []
+        for (path, _), future in zip(calls, futures):
+            try:
+                results.append(future.result(timeout=self._remaining()))
+            except (requests.RequestException, FutureTimeout) as e:
+                print(f"Error fetching {path} from TMDB: {e or 'deadline exceeded'}")
+                results.append(None)
+        return results
+
+    def _remaining(self):
+        """
+        Seconds left before the current deadline (None without one); raises once it has passed.
+        """
+        left = time_left()
+        if left is not None and left <= 0:
+            raise DeadlineExceeded("request deadline exceeded before calling TMDB")
+        return left
+
+    def _request(self, path, params):
+        # A deadline that passed before any upstream attempt says nothing about TMDB's
+        # health, so it is raised before the breaker is consulted
+        timeout = self._timeout()
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"TMDB circuit open, not calling {path}")
+        params["api_key"] = self.api_key
+        url = f"{self.base_url}{path}"
+
+        try:
+            result = self._request_with_retries(url, params, timeout)
+        except requests.HTTPError as e:
+            # 4xx (e.g. unknown id) is an answer, not an outage
+            status = e.response.status_code if e.response is not None else None
+            if status in RETRY_STATUSES or status is None:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        except DeadlineExceeded:
+            # The caller's budget ran out, not TMDB's patience: only free a probe slot
+            self.breaker.release()
+            raise
+        except Exception:
+            # Connection errors and timeouts that ran with the full configured timeout
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _request_with_retries(self, url, params, timeout):
+        attempt = 0
+        while True:
+            try:
+                resp = self.session.get(url, params=params, timeout=timeout)
+                resp.raise_for_status()
+                return resp.json()
+            except requests.HTTPError as e:
+                if e.response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    raise
+                error, retry_after = e, e.response.headers.get("Retry-After")
+            except requests.Timeout as e:
+                # ConnectTimeout is also a ConnectionError, so it has to be checked here first
+                phase = 0 if isinstance(e, requests.ConnectTimeout) else 1
+                if timeout[phase] < self.timeout[phase]:
+                    raise DeadlineExceeded(f"request deadline exceeded calling {url}") from e
+                if attempt >= self.max_retries:
+                    raise
+                error, retry_after = e, None
+            except requests.ConnectionError as e:
+                if attempt >= self.max_retries:
+                    raise
+                error, retry_after = e, None
+
+            try:
+                self._sleep(attempt, retry_after)
+                timeout = self._timeout()
+            except DeadlineExceeded:
+                # TMDB did fail this attempt; the deadline only stopped the retries
+                raise error
+            attempt += 1
+
+    def _timeout(self):
+        # Connect/read timeouts, shortened to whatever is left of the deadline
+        left = self._remaining()
+        if left is None:
+            return self.timeout
+        return tuple(min(t, left) for t in self.timeout)
+
+    def _sleep(self, attempt, retry_after=None):
+        # Jitter keeps a burst of workers from retrying in lockstep
+        delay = self.backoff * (2 ** attempt)
+        delay = random.uniform(delay / 2, delay)
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), MAX_RETRY_AFTER))
+            except ValueError:
+                pass
+        left = self._remaining()
+        if left is not None and delay >= left:
+            raise DeadlineExceeded("no time left for another TMDB retry")
+        time.sleep(delay)
+
+
+tmdb = TMDBClient()
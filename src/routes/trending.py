@@ -0,0 +1,120 @@
+# src/routes/trending.py
+import os
+import time
+import threading
+
+from dotenv import load_dotenv
+
+from .cache import TTLCache, MISS
+from .tmdb_client import tmdb
+from .daemons import start_per_process_daemon
+
+load_dotenv()
+
+# ── Trending snapshot configuration from .env ────────────────────────────────────
+TRENDING_REGIONS          = [r.strip() for r in os.getenv("TRENDING_REGIONS", "IN").split(",") if r.strip()]
+TRENDING_REFRESH_INTERVAL = int(os.getenv("TRENDING_REFRESH_INTERVAL", "1800"))  # seconds
+TRENDING_TOP_N            = int(os.getenv("TRENDING_TOP_N", "20"))
+# How long the last good snapshot stays in the shared cache for cold-starting workers
+TRENDING_SNAPSHOT_TTL     = int(os.getenv("TRENDING_SNAPSHOT_TTL", str(24 * 3600)))
+
+
+class RegionalFeed:
+    """
+    Per-region list snapshot built from TMDB by `fetch(region)`, which returns the
+    items or None on failure. A background thread refreshes every region on a
+    schedule; readers only ever see the last good snapshot, so a failed refresh
+    never empties the page.
+    """
+
+    def __init__(self, name, fetch, regions, interval, snapshot_ttl=TRENDING_SNAPSHOT_TTL):
+        self.name = name
+        self.fetch = fetch
+        self.regions = list(regions)
+        self.interval = interval
+        self.snapshots = {}  # region -> {"items": [...], "fetched_at": epoch seconds}
+        self.shared = TTLCache(name, snapshot_ttl, maxsize=64)
+        self._attempted = {}  # region -> time of the last synchronous cold-start fetch
+        self._lock = threading.Lock()
+
+    def refresh(self, region):
+        """
+        Replace the region's snapshot if the fetch returned something; keep the old one otherwise.
+        """
+        try:
+            items = self.fetch(region)
+        except Exception as e:
+            print(f"{self.name} refresh error ({region}): {e}")
+            items = None
+        if not items:
+            print(f"{self.name} refresh for {region} returned nothing; keeping the last snapshot")
+            return False
+        snapshot = {"items": items, "fetched_at": time.time()}
+        self.snapshots[region] = snapshot
+        self.shared.set(region, snapshot)
+        return True
+
+    def get(self, region):
+        """
+        Latest snapshot items for `region` (possibly stale, possibly empty on a cold
+        start with TMDB down). Only the first read in a process may wait on TMDB.
+        """
+        self.ensure_refresher()
+        snapshot = self.snapshots.get(region)
+        if snapshot is None:
+            with self._lock:
+                snapshot = self.snapshots.get(region)
+                if snapshot is None:
+                    # Another worker's last snapshot, else fetch now
+                    shared = self.shared.get(region)
+                    if shared is not MISS:
+                        self.snapshots[region] = shared
+                    elif time.time() - self._attempted.get(region, 0) >= 60:
+                        # At most one blocking attempt a minute while TMDB is failing
+                        self._attempted[region] = time.time()
+                        self.refresh(region)
+                    if region not in self.regions:
+                        self.regions.append(region)
+                    snapshot = self.snapshots.get(region)
+        return snapshot["items"] if snapshot else []
+
+    def ensure_refresher(self):
+        """
+        Start this process's refresh thread on first use.
+        """
+        if self.interval <= 0:
+            return
+
+        def run():
+            while True:
+                for region in list(self.regions):
+                    snapshot = self.snapshots.get(region)
+                    # Adopt a newer snapshot another worker already fetched
+                    shared = self.shared.get(region)
+                    if shared is not MISS and (snapshot is None or shared["fetched_at"] > snapshot["fetched_at"]):
+                        self.snapshots[region] = snapshot = shared
+                    if snapshot is None or time.time() - snapshot["fetched_at"] >= self.interval:
+                        self.refresh(region)
+                time.sleep(min(self.interval, 60))
+
+        start_per_process_daemon(f"{self.name}-refresher", run)
+
+
+def fetch_trending(region, top_n=TRENDING_TOP_N):
+    """
+    This week's trending movies + TV for `region`, merged and sorted by popularity;
+    None if both calls failed.
+    """
+    movie_data, tv_data = tmdb.get_many([
+        ("/trending/movie/week", {"region": region}),
+        ("/trending/tv/week", {"region": region}),
+    ])
+    if movie_data is None and tv_data is None:
+        return None
+    combined = ((movie_data or {}).get("results") or []) + ((tv_data or {}).get("results") or [])
+    # Sort by popularity descending
+    combined.sort(key=lambda x: x.get("popularity", 0) or 0, reverse=True)
+    return combined[:top_n]
+
+
+trending = RegionalFeed("trending", fetch_trending, TRENDING_REGIONS, TRENDING_REFRESH_INTERVAL)
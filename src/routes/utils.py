@@ -1,5 +1,7 @@
 # src/routes/utils.py
 import re
+import ast
+import json
 import string
 
 def clean_text(text):
@@ -8,4 +10,32 @@ def clean_text(text):
     text = re.sub(r'\d+', '', text)  # Remove digits
     text = text.translate(str.maketrans("", "", string.punctuation))  # Remove punctuation
     text = re.sub(r'\s+', ' ', text).strip()  # Normalize whitespace
-    return text
\ No newline at end of file
+    return text
+
+
+def parse_genres(value):
+    """Parse a genres cell (list, JSON/Python list literal or 'A|B' / 'A, B' string) into a list of names"""
+    if isinstance(value, (list, tuple)):
+        items = value
+    elif not isinstance(value, str) or not value.strip():
+        return []
+    else:
+        text = value.strip()
+        if text.startswith("["):
+            try:
+                items = json.loads(text)
+            except ValueError:
+                try:
+                    items = ast.literal_eval(text)
+                except (ValueError, SyntaxError):
+                    items = re.findall(r"[\w][\w &-]*", text)
+        else:
+            items = re.split(r"[|,]", text)
+
+    names = []
+    for item in items:
+        name = item.get("name") if isinstance(item, dict) else item  # TMDB style [{"id":..,"name":..}]
+        name = str(name or "").strip()
+        if name:
+            names.append(name)
+    return names
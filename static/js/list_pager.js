@@ -0,0 +1,55 @@
+// Infinite scroll for the watchlist/favorites grids: when the sentinel below the grid
+// comes into view, fetch the next page of cards as JSON and append them.
+(() => {
+  const grid = document.querySelector('.movie-grid[data-list]');
+  const sentinel = document.getElementById('list-sentinel');
+  if (!grid || !sentinel || !grid.dataset.nextPage) return;
+
+  const escape = text => {
+    const div = document.createElement('div');
+    div.textContent = text == null ? '' : String(text);
+    return div.innerHTML;
+  };
+
+  const renderCard = card => {
+    const poster = card.poster_path
+      ? `https://image.tmdb.org/t/p/w300${escape(card.poster_path)}`
+      : grid.dataset.placeholder;
+    const year = card.release_date ? escape(card.release_date.slice(0, 4)) : 'N/A';
+    const rating = card.vote_average != null ? (card.vote_average / 2).toFixed(1) + ' / 5' : 'N/A';
+    const el = document.createElement('div');
+    el.className = 'movie-card';
+    el.innerHTML = `
+      <a href="${grid.dataset.detailsUrl.replace('ITEM_TYPE', escape(card.type))}${escape(card.id)}">
+        <div class="poster-container"><img src="${poster}" alt="${escape(card.title)}"></div>
+        <div class="movie-info">
+          <h3>${escape(card.title)}</h3>
+          <div class="movie-meta"><span>${year}</span><span>${rating}</span></div>
+        </div>
+        <div class="card-popup"><p>View Details</p></div>
+      </a>`;
+    return el;
+  };
+
+  let loading = false;
+  const loadMore = async () => {
+    if (loading || !grid.dataset.nextPage) return;
+    loading = true;
+    try {
+      const url = `${grid.dataset.url}?page=${grid.dataset.nextPage}`;
+      const data = await (await fetch(url)).json();
+      data.cards.forEach(card => grid.appendChild(renderCard(card)));
+      grid.dataset.nextPage = data.next_page || '';
+      if (!data.next_page) observer.disconnect();
+    } catch (e) {
+      console.error('Failed to load more items', e);
+    } finally {
+      loading = false;
+    }
+  };
+
+  const observer = new IntersectionObserver(entries => {
+    if (entries.some(entry => entry.isIntersecting)) loadMore();
+  }, { rootMargin: '400px' });
+  observer.observe(sentinel);
+})();
@@ -1,6 +1,3 @@
-export const TMDB_API_KEY = '1a483b7f5ffd41254a97bd00fa4ee773';
-export const TMDB_BASE_URL = 'https://api.themoviedb.org/3';
-
 // Toggle password visibility
 function setupPasswordToggle() {
     const togglePassword = document.querySelector('.toggle-password');